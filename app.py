@@ -1,15 +1,34 @@
 """Streamlit 主应用 - PV Pile Integration System."""
 
+import functools
+import hashlib
+import json
 import logging
+import shutil
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
+
+import cv2
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库 json
+    orjson = None
 
 import config
-from src.geometry.corrector import apply_geometric_correction
-from src.inference.docker_client import check_container_status, run_docker_inference
+from src.geometry.corrector import CORRECTION_VERSION, apply_geometric_correction
+from src.inference.docker_client import ContainerStatusMonitor, run_docker_inference
+from src.inference.models import Detection
 from src.inference.result_parser import get_detection_stats, parse_sahi_results
-from src.visualization.image_stitcher import create_visualization, image_to_pil
+from src.visualization.image_stitcher import (
+    create_visualization,
+    encode_image,
+    get_image_shape,
+    load_image,
+)
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -27,8 +46,7 @@ st.set_page_config(
 config.ensure_directories()
 
 # 自定义 CSS 样式（MagicUI 专业设计风格）
-st.markdown(
-    """
+_CUSTOM_CSS = """
     <style>
     /* MagicUI 专业设计风格 */
     .main {
@@ -157,82 +175,732 @@ st.markdown(
         background-color: #f1f5f9;
     }
     </style>
-    """,
-    unsafe_allow_html=True,
+"""
+
+# 通过 st.html 注入，纯样式内容无需经过 Markdown 解析
+st.html(_CUSTOM_CSS)
+
+
+# 与当前图像绑定的推理结果，切换图像时需要清除
+_RESULT_STATE_KEYS: tuple[str, ...] = (
+    "detections",
+    "stats",
+    "corrected_detections",
+    "corrected_stats",
+    "correction_stats",
+    "input_path",
+    "detection_dicts",
+    "corrected_detection_dicts",
+    "vis_inference",
+    "vis_corrected",
+    "inference_done",
+    "inference_task",
 )
 
 
-def main() -> None:
-    """主应用函数."""
-    st.title("PV Pile Integration System")
-    st.markdown("光伏板桩基检测集成系统 - 整合 PV Pile 和 SolarGeoFix")
+@st.cache_resource(show_spinner=False)
+def _get_container_monitor() -> ContainerStatusMonitor:
+    """
+    获取全局的容器状态监视器（进程内只创建一次）.
     
-    # 侧边栏 - 参数配置
-    with st.sidebar:
-        st.header("配置参数")
+    状态由后台线程定期刷新，页面渲染时只读取最近一次的结果，不访问 Docker。
+    
+    Returns:
+        容器状态监视器
+    """
+    return ContainerStatusMonitor()
+
+
+@st.cache_resource(show_spinner=False)
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    获取全局共享的线程池（进程内只创建一次，避免每次绘制都创建和销毁线程）.
+    
+    Returns:
+        线程池
+    """
+    return ThreadPoolExecutor(max_workers=config.MAX_WORKERS, thread_name_prefix="pvpd")
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _cached_base_image(image_path: str, mtime: float) -> np.ndarray:
+    """
+    带缓存的原图解码结果（以路径和修改时间为键）.
+    
+    用不同参数重新推理时，可视化只需重绘检测框而无需再次解码原图。
+    返回的数组在所有会话间共享，因此设为只读。
+    
+    Args:
+        image_path: 图像文件路径（文件名包含内容摘要）
+        mtime: 文件修改时间，文件变化时使缓存失效
+        
+    Returns:
+        只读的原图数组（BGR 格式）
+    """
+    image = load_image(image_path)
+    image.setflags(write=False)
+    return image
+
+
+@st.cache_data(show_spinner=False, persist="disk")
+def _cached_inference(
+    image_path: str,
+    slice_height: int,
+    slice_width: int,
+    conf_threshold: float,
+    overlap_ratio: float,
+) -> tuple[dict[str, Any], list[Detection], dict[str, Any]]:
+    """
+    带缓存的 Docker 推理（同一图像内容 + 相同推理参数只推理一次）.
+    
+    输入文件名包含内容摘要，因此以路径为键即等价于以图像内容为键。
+    缓存中保存解析后的检测结果及其统计信息，而不只是 JSON 路径，
+    因为不同参数的推理会覆盖同名的输出文件。
+    
+    Args:
+        image_path: 输入图像路径（文件名包含内容摘要）
+        slice_height: SAHI 切片高度
+        slice_width: SAHI 切片宽度
+        conf_threshold: 置信度阈值
+        overlap_ratio: 重叠比例
+        
+    Returns:
+        (推理结果字典, 检测结果列表, 检测统计信息)
+    """
+    result = run_docker_inference(
+        image_path=Path(image_path),
+        output_dir=config.OUTPUT_DIR,
+        slice_height=slice_height,
+        slice_width=slice_width,
+        conf_threshold=conf_threshold,
+        overlap_ratio=overlap_ratio,
+    )
+    detections = parse_sahi_results(result["json_path"])
+    return result, detections, get_detection_stats(detections)
+
+
+@st.cache_data(show_spinner=False, persist="disk")
+def _cached_correction(
+    image_path: str,
+    slice_height: int,
+    slice_width: int,
+    conf_threshold: float,
+    overlap_ratio: float,
+    use_chain_search: bool,
+    use_ransac: bool,
+    use_grid_fill: bool,
+    ransac_degree: int,
+    ransac_threshold: float,
+    grid_spacing: float,
+    correction_version: int,
+) -> tuple[list[Detection], dict[str, Any], dict[str, Any]]:
+    """
+    带磁盘缓存的几何校正（以图像内容 + 推理参数 + 校正参数 + 校正算法版本为键）.
+    
+    缓存键只包含标量参数，无需对检测结果列表做哈希；持久化到磁盘后，
+    Streamlit 进程重启时重新上传同一图像也无需重新推理和校正。
+    Streamlit 只按参数和本函数的源码区分缓存，校正算法更新后由 correction_version 使磁盘上的旧结果失效。
+    
+    Args:
+        image_path: 输入图像路径（文件名包含内容摘要）
+        slice_height: SAHI 切片高度
+        slice_width: SAHI 切片宽度
+        conf_threshold: 置信度阈值
+        overlap_ratio: 重叠比例
+        use_chain_search: 是否使用链式搜索
+        use_ransac: 是否使用 RANSAC 拟合
+        use_grid_fill: 是否使用网格填充
+        ransac_degree: RANSAC 多项式次数
+        ransac_threshold: RANSAC 残差阈值
+        grid_spacing: 网格间距
+        correction_version: 校正算法版本（调用时传入 CORRECTION_VERSION，只用于缓存键）
+        
+    Returns:
+        (校正后的检测结果列表, 校正统计信息, 校正后检测统计信息)
+    """
+    _, detections, _ = _cached_inference(
+        image_path, slice_height, slice_width, conf_threshold, overlap_ratio
+    )
+    corrected_detections, correction_stats = apply_geometric_correction(
+        detections=detections,
+        image_shape=get_image_shape(image_path),
+        use_chain_search=use_chain_search,
+        use_ransac=use_ransac,
+        use_grid_fill=use_grid_fill,
+        ransac_degree=ransac_degree,
+        ransac_threshold=ransac_threshold,
+        grid_spacing=grid_spacing,
+    )
+    return corrected_detections, correction_stats, get_detection_stats(corrected_detections)
+
+
+@st.cache_resource(show_spinner=False)
+def _get_inference_executor() -> ThreadPoolExecutor:
+    """
+    获取全局共享的后台推理线程池（与可视化线程池分开，避免长时间推理占满绘制线程）.
+    
+    Returns:
+        线程池
+    """
+    return ThreadPoolExecutor(
+        max_workers=config.INFERENCE_WORKERS, thread_name_prefix="pvpd-inference"
+    )
+
+
+def _run_inference_pipeline(
+    image_path: str,
+    slice_height: int,
+    slice_width: int,
+    conf_threshold: float,
+    overlap_ratio: float,
+    use_chain_search: bool,
+    use_ransac: bool,
+    use_grid_fill: bool,
+    ransac_degree: int,
+    ransac_threshold: float,
+    grid_spacing: float,
+) -> tuple[list[Detection], dict[str, Any], list[Detection], dict[str, Any], dict[str, Any]]:
+    """
+    运行推理和几何校正（不调用 Streamlit 元素，可在后台线程中执行）.
+    
+    相同图像和参数直接复用缓存。
+    
+    Args:
+        image_path: 输入图像路径（文件名包含内容摘要）
+        slice_height: SAHI 切片高度
+        slice_width: SAHI 切片宽度
+        conf_threshold: 置信度阈值
+        overlap_ratio: 重叠比例
+        use_chain_search: 是否使用链式搜索
+        use_ransac: 是否使用 RANSAC 拟合
+        use_grid_fill: 是否使用网格填充
+        ransac_degree: RANSAC 多项式次数
+        ransac_threshold: RANSAC 残差阈值
+        grid_spacing: 网格间距
+        
+    Returns:
+        (检测结果列表, 检测统计信息, 校正后的检测结果列表, 校正统计信息, 校正后检测统计信息)
+    """
+    _, detections, stats = _cached_inference(
+        image_path, slice_height, slice_width, conf_threshold, overlap_ratio
+    )
+    corrected_detections, correction_stats, corrected_stats = _cached_correction(
+        image_path,
+        slice_height,
+        slice_width,
+        conf_threshold,
+        overlap_ratio,
+        use_chain_search,
+        use_ransac,
+        use_grid_fill,
+        ransac_degree,
+        ransac_threshold,
+        grid_spacing,
+        CORRECTION_VERSION,
+    )
+    return detections, stats, corrected_detections, correction_stats, corrected_stats
+
+
+@st.fragment(run_every=config.INFERENCE_POLL_INTERVAL_SECONDS)
+def _render_inference_progress() -> None:
+    """
+    显示后台推理进度（定期只重跑本 fragment，推理完成后重跑整个页面以显示结果）.
+    """
+    inference_task = st.session_state.get("inference_task")
+    if inference_task is None or inference_task[1].done():
+        st.rerun()
+    
+    st.info("正在运行推理，请稍候...")
+
+
+def _get_upload_digest(uploaded_file: Any) -> str:
+    """
+    计算上传文件内容的 SHA-256 摘要（同一上传只计算一次）.
+    
+    Args:
+        uploaded_file: Streamlit 上传文件对象
+        
+    Returns:
+        十六进制摘要字符串
+    """
+    cached = st.session_state.get("upload_digest")
+    if cached is not None and cached[0] == uploaded_file.file_id:
+        return cached[1]
+    
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    for chunk in iter(lambda: uploaded_file.read(config.UPLOAD_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    
+    st.session_state["upload_digest"] = (uploaded_file.file_id, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def _encode_preview(image: np.ndarray) -> bytes:
+    """
+    生成页面预览用的缩略图 JPEG.
+    
+    浏览器只会把图像缩放到列宽显示，发送原始分辨率没有意义。
+    
+    Args:
+        image: 图像数组（BGR 格式，不会被修改）
         
-        slice_height = st.number_input(
-            "切片高度",
-            min_value=128,
-            max_value=2048,
-            value=config.DEFAULT_SLICE_HEIGHT,
-            step=64,
-            help="SAHI 切片的像素高度"
+    Returns:
+        JPEG 字节
+    """
+    height, width = image.shape[:2]
+    scale = config.PREVIEW_MAX_SIZE / max(height, width)
+    if scale < 1:
+        image = cv2.resize(
+            image,
+            (max(1, round(width * scale)), max(1, round(height * scale))),
+            interpolation=cv2.INTER_AREA,
         )
+    return encode_image(image, ".jpg", [cv2.IMWRITE_JPEG_QUALITY, config.PREVIEW_JPEG_QUALITY])
+
+
+@st.cache_data(show_spinner=False)
+def _cached_original_preview(image_path: str, mtime: float) -> bytes:
+    """
+    带缓存的原图预览缩略图（复用原图解码缓存，mtime 参与缓存键）.
+    
+    cv2.imread 会按 EXIF 方向旋转，与 st.image 的显示效果一致。
+    
+    Args:
+        image_path: 图像文件路径
+        mtime: 文件修改时间
         
-        slice_width = st.number_input(
-            "切片宽度",
-            min_value=128,
-            max_value=2048,
-            value=config.DEFAULT_SLICE_WIDTH,
-            step=64,
-            help="SAHI 切片的像素宽度"
+    Returns:
+        JPEG 字节
+    """
+    return _encode_preview(_cached_base_image(image_path, mtime))
+
+
+def _render_visualization(
+    input_path: Path,
+    base_image: np.ndarray,
+    detections: list[Detection],
+) -> tuple[bytes, bytes]:
+    """
+    在原图上绘制检测结果并编码（不调用 Streamlit，可在工作线程中执行）.
+    
+    页面显示使用 JPEG（体积小、编码快），下载使用无损 PNG。
+    
+    Args:
+        input_path: 输入图像路径
+        base_image: 已解码的原图（BGR 格式，不会被修改）
+        detections: 检测结果列表
+        
+    Returns:
+        (预览 JPEG 字节, 下载用 PNG 字节)
+    """
+    vis_image = create_visualization(
+        image_path=input_path,
+        detections=detections,
+        thickness=2,
+        show_label=False,
+        show_confidence=False,
+        image=base_image,
+    )
+    
+    # 直接从 BGR 数组编码，无需转换为 PIL 图像
+    png_bytes = encode_image(
+        vis_image, ".png", [cv2.IMWRITE_PNG_COMPRESSION, config.PNG_COMPRESS_LEVEL]
+    )
+    
+    return _encode_preview(vis_image), png_bytes
+
+
+def _dumps_json(data: Any, indent: bool = False) -> bytes:
+    """
+    序列化为 UTF-8 JSON 字节（安装了 orjson 时使用 orjson，否则使用标准库）.
+    
+    Args:
+        data: 待序列化的数据
+        indent: 是否使用 2 空格缩进
+        
+    Returns:
+        UTF-8 编码的 JSON 字节（非 ASCII 字符不转义）
+    """
+    if orjson is not None:
+        # 统计信息中的类别计数以整数类别 ID 为键，与 json 一样转换为字符串键
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    return json.dumps(data, indent=2 if indent else None, ensure_ascii=False).encode("utf-8")
+
+
+def _detections_digest(detection_dicts: list[dict[str, Any]]) -> str:
+    """
+    计算检测结果的摘要（用作可视化缓存键）.
+    
+    Args:
+        detection_dicts: 检测结果字典列表（推理完成时预先转换，与 JSON 导出共用）
+        
+    Returns:
+        十六进制摘要字符串
+    """
+    return hashlib.blake2b(_dumps_json(detection_dicts), digest_size=16).hexdigest()
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _cached_visualizations(
+    image_path: str,
+    mtime: float,
+    detections_digest: str,
+    corrected_digest: str,
+    _detections: list[Detection],
+    _corrected_detections: list[Detection],
+) -> tuple[tuple[bytes, bytes], tuple[bytes, bytes]]:
+    """
+    带缓存的可视化绘制与编码（以图像和两组检测结果的摘要为键）.
+    
+    检测结果列表以下划线开头，不参与 Streamlit 的参数哈希，由摘要代替。
+    两张图像共用同一份原图解码结果，互不依赖，在线程池中并行绘制和编码。
+    
+    Args:
+        image_path: 输入图像路径
+        mtime: 文件修改时间，文件变化时使缓存失效
+        detections_digest: 原始检测结果摘要
+        corrected_digest: 校正后检测结果摘要
+        _detections: 原始检测结果列表
+        _corrected_detections: 校正后的检测结果列表
+        
+    Returns:
+        ((推理结果预览 JPEG, 推理结果 PNG), (校正结果预览 JPEG, 校正结果 PNG))
+    """
+    input_path = Path(image_path)
+    base_image = _cached_base_image(image_path, mtime)
+    executor = _get_executor()
+    inference_future = executor.submit(
+        _render_visualization, input_path, base_image, _detections
+    )
+    corrected_future = executor.submit(
+        _render_visualization, input_path, base_image, _corrected_detections
+    )
+    return inference_future.result(), corrected_future.result()
+
+
+def _get_visualizations() -> tuple[tuple[bytes, bytes], tuple[bytes, bytes]]:
+    """
+    获取当前推理结果和校正结果的可视化图像（结果保存在 session state 中，重跑时直接复用）.
+    
+    session state 中没有时从跨会话的可视化缓存中获取，切换回之前的参数时无需重新绘制。
+    缓存键直接使用推理完成时预先转换的字典列表计算，不再重复转换。
+    
+    Returns:
+        ((推理结果预览 JPEG, 推理结果 PNG), (校正结果预览 JPEG, 校正结果 PNG))
+    """
+    if "vis_inference" not in st.session_state or "vis_corrected" not in st.session_state:
+        input_path = st.session_state["input_path"]
+        (
+            st.session_state["vis_inference"],
+            st.session_state["vis_corrected"],
+        ) = _cached_visualizations(
+            str(input_path),
+            input_path.stat().st_mtime,
+            _detections_digest(st.session_state["detection_dicts"]),
+            _detections_digest(st.session_state["corrected_detection_dicts"]),
+            st.session_state["detections"],
+            st.session_state["corrected_detections"],
         )
+    
+    return st.session_state["vis_inference"], st.session_state["vis_corrected"]
+
+
+def _build_inference_json(
+    input_path: Path,
+    detection_dicts: list[dict[str, Any]],
+    stats: dict[str, Any],
+) -> bytes:
+    """
+    构建推理结果 JSON（作为下载回调，仅在用户点击下载时执行）.
+    
+    Args:
+        input_path: 输入图像路径
+        detection_dicts: 检测结果字典列表
+        stats: 检测统计信息
+        
+    Returns:
+        UTF-8 编码的 JSON 字节
+    """
+    json_data = {
+        "image": str(input_path),
+        "detections": detection_dicts,
+        "stats": stats,
+    }
+    return _dumps_json(json_data, indent=True)
+
+
+def _build_correction_json(
+    input_path: Path,
+    detection_dicts: list[dict[str, Any]],
+    corrected_detection_dicts: list[dict[str, Any]],
+    correction_stats: dict[str, Any],
+    corrected_stats: dict[str, Any],
+) -> bytes:
+    """
+    构建几何校正结果 JSON（作为下载回调，仅在用户点击下载时执行）.
+    
+    Args:
+        input_path: 输入图像路径
+        detection_dicts: 原始检测结果字典列表
+        corrected_detection_dicts: 校正后的检测结果字典列表
+        correction_stats: 校正统计信息
+        corrected_stats: 校正后检测统计信息
         
-        conf_threshold = st.slider(
-            "置信度阈值",
-            min_value=0.0,
-            max_value=1.0,
-            value=config.DEFAULT_CONF_THRESHOLD,
-            step=0.05,
-            help="检测结果的最小置信度"
+    Returns:
+        UTF-8 编码的 JSON 字节
+    """
+    json_data = {
+        "image": str(input_path),
+        "original_detections": detection_dicts,
+        "corrected_detections": corrected_detection_dicts,
+        "correction_stats": correction_stats,
+        "corrected_stats": corrected_stats,
+    }
+    return _dumps_json(json_data, indent=True)
+
+
+@st.fragment
+def _render_inference_results(current_file_name: str) -> None:
+    """
+    显示推理结果面板（统计、可视化、下载）.
+    
+    作为 fragment 执行：面板内的下载按钮只重跑本面板，不会重跑整个页面。
+    
+    Args:
+        current_file_name: 当前上传的文件名，用于生成下载文件名
+    """
+    # inference_done 只在当前图像推理成功后设置，切换图像时清除
+    if not st.session_state.get("inference_done", False) or not st.session_state["detections"]:
+        return
+    
+    stats = st.session_state["stats"]
+    input_path = st.session_state["input_path"]
+    
+    # 推理结果可视化
+    st.header("推理结果")
+    
+    # 统计信息
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("总检测数", stats["total"])
+    with col2:
+        st.metric("高置信度", stats["high_confidence"])
+    with col3:
+        st.metric("中置信度", stats["medium_confidence"])
+    with col4:
+        st.metric("低置信度", stats["low_confidence"])
+    
+    st.metric("平均置信度", f"{stats['avg_confidence']:.3f}")
+    
+    # 创建可视化图像
+    try:
+        (preview_bytes, png_bytes), _ = _get_visualizations()
+        
+        # 显示可视化结果
+        st.image(preview_bytes, width="stretch", caption="推理结果可视化")
+        
+        # 下载按钮
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.download_button(
+                label="下载推理结果图像",
+                data=png_bytes,
+                file_name=f"{Path(current_file_name).stem}_inference.png",
+                mime="image/png",
+                width="stretch",
+            )
+        
+        with col2:
+            # 导出 JSON 结果（点击时才序列化）
+            st.download_button(
+                label="导出 JSON 结果",
+                data=functools.partial(
+                    _build_inference_json,
+                    input_path,
+                    st.session_state["detection_dicts"],
+                    stats,
+                ),
+                file_name=f"{Path(current_file_name).stem}_inference.json",
+                mime="application/json",
+                width="stretch",
+            )
+    
+    except Exception as e:
+        logger.exception("可视化失败")
+        st.error(f"可视化失败: {str(e)}")
+
+
+@st.fragment
+def _render_correction_results(current_file_name: str) -> None:
+    """
+    显示几何校正结果面板（统计、可视化、下载）.
+    
+    作为 fragment 执行：面板内的下载按钮只重跑本面板，不会重跑整个页面。
+    
+    Args:
+        current_file_name: 当前上传的文件名，用于生成下载文件名
+    """
+    st.header("几何校正结果")
+    if not st.session_state.get("inference_done", False):
+        return
+    
+    corrected_stats = st.session_state["corrected_stats"]
+    correction_stats = st.session_state["correction_stats"]
+    input_path = st.session_state["input_path"]
+    
+    # 校正统计信息
+    st.subheader("校正统计")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("原始检测数", correction_stats["original_count"])
+    with col2:
+        st.metric("校正后检测数", correction_stats["corrected_count"])
+    with col3:
+        delta = correction_stats["added_count"] - correction_stats["removed_count"]
+        st.metric(
+            "变化",
+            f"{delta:+d}",
+            delta=delta,
         )
+    with col4:
+        st.metric("新增检测", correction_stats["added_count"])
+    
+    # 校正后统计信息
+    st.subheader("校正后统计")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("总检测数", corrected_stats["total"])
+    with col2:
+        st.metric("高置信度", corrected_stats["high_confidence"])
+    with col3:
+        st.metric("中置信度", corrected_stats["medium_confidence"])
+    with col4:
+        st.metric("低置信度", corrected_stats["low_confidence"])
+    
+    st.metric("平均置信度", f"{corrected_stats['avg_confidence']:.3f}")
+    
+    # 创建校正后的可视化图像
+    try:
+        _, (corrected_preview_bytes, corrected_png_bytes) = _get_visualizations()
         
-        overlap_ratio = st.slider(
-            "重叠比例",
-            min_value=0.0,
-            max_value=0.5,
-            value=config.DEFAULT_OVERLAP_RATIO,
-            step=0.05,
-            help="切片之间的重叠比例"
+        # 显示校正后的可视化结果
+        st.subheader("校正后可视化")
+        st.image(
+            corrected_preview_bytes,
+            width="stretch",
+            caption="几何校正后的检测结果",
         )
         
-        st.divider()
-        st.subheader("几何校正参数")
+        # 下载按钮
+        col1, col2 = st.columns(2)
         
-        use_chain_search = st.checkbox(
-            "使用链式搜索算法（推荐）",
-            value=False,
-            help="使用链式搜索算法识别桩列，适合复杂场景（多列、弯曲）"
-        )
+        with col1:
+            st.download_button(
+                label="下载校正结果图像",
+                data=corrected_png_bytes,
+                file_name=f"{Path(current_file_name).stem}_corrected.png",
+                mime="image/png",
+                width="stretch",
+            )
+        
+        with col2:
+            # 导出 JSON 结果（点击时才序列化）
+            st.download_button(
+                label="导出校正 JSON 结果",
+                data=functools.partial(
+                    _build_correction_json,
+                    input_path,
+                    st.session_state["detection_dicts"],
+                    st.session_state["corrected_detection_dicts"],
+                    correction_stats,
+                    corrected_stats,
+                ),
+                file_name=f"{Path(current_file_name).stem}_corrected.json",
+                mime="application/json",
+                width="stretch",
+            )
+    
+    except Exception as e:
+        logger.exception("校正结果可视化失败")
+        st.error(f"校正结果可视化失败: {str(e)}")
+
+
+def main() -> None:
+    """主应用函数."""
+    st.title("PV Pile Integration System")
+    st.markdown("光伏板桩基检测集成系统 - 整合 PV Pile 和 SolarGeoFix")
+    
+    # 侧边栏 - 参数配置
+    # 所有参数放在同一个表单中，调整过程中不会触发重跑，点击“应用参数”后一次性生效
+    with st.sidebar:
+        st.header("配置参数")
         
-        if not use_chain_search:
+        with st.form("params"):
+            slice_height = st.number_input(
+                "切片高度",
+                min_value=128,
+                max_value=2048,
+                value=config.DEFAULT_SLICE_HEIGHT,
+                step=64,
+                help="SAHI 切片的像素高度"
+            )
+            
+            slice_width = st.number_input(
+                "切片宽度",
+                min_value=128,
+                max_value=2048,
+                value=config.DEFAULT_SLICE_WIDTH,
+                step=64,
+                help="SAHI 切片的像素宽度"
+            )
+            
+            conf_threshold = st.slider(
+                "置信度阈值",
+                min_value=0.0,
+                max_value=1.0,
+                value=config.DEFAULT_CONF_THRESHOLD,
+                step=0.05,
+                help="检测结果的最小置信度"
+            )
+            
+            overlap_ratio = st.slider(
+                "重叠比例",
+                min_value=0.0,
+                max_value=0.5,
+                value=config.DEFAULT_OVERLAP_RATIO,
+                step=0.05,
+                help="切片之间的重叠比例"
+            )
+            
+            st.divider()
+            st.subheader("几何校正参数")
+            
+            # 表单内的控件在提交前不会触发重跑，因此不能按勾选状态动态显示/隐藏，
+            # 所有参数始终显示，由下方逻辑决定是否生效
+            use_chain_search = st.checkbox(
+                "使用链式搜索算法（推荐）",
+                value=False,
+                help="使用链式搜索算法识别桩列，适合复杂场景（多列、弯曲）"
+            )
+            
             use_ransac = st.checkbox(
                 "使用 RANSAC 回归",
                 value=True,
-                help="使用 RANSAC 回归修正检测点位置"
+                help="使用 RANSAC 回归修正检测点位置（未启用链式搜索时生效）"
             )
             
             use_grid_fill = st.checkbox(
                 "使用网格填充",
                 value=True,
-                help="使用网格填充算法生成缺失的检测点"
+                help="使用网格填充算法生成缺失的检测点（未启用链式搜索时生效）"
             )
-        else:
-            use_ransac = False
-            use_grid_fill = False
-        
-        if use_ransac:
+            
             ransac_degree = st.slider(
                 "RANSAC 多项式次数",
                 min_value=1,
@@ -249,11 +917,7 @@ def main() -> None:
                 step=1.0,
                 help="RANSAC 回归的残差阈值"
             )
-        else:
-            ransac_degree = 2
-            ransac_threshold = 10.0
-        
-        if use_grid_fill:
+            
             grid_spacing = st.slider(
                 "网格间距",
                 min_value=20.0,
@@ -262,8 +926,12 @@ def main() -> None:
                 step=10.0,
                 help="网格填充的间距（像素）"
             )
-        else:
-            grid_spacing = 50.0
+            
+            st.form_submit_button("应用参数", width="stretch")
+        
+        if use_chain_search:
+            use_ransac = False
+            use_grid_fill = False
     
     # 主内容区
     st.header("图像上传")
@@ -283,53 +951,61 @@ def main() -> None:
         # 如果图像发生变化，清除所有相关的 session state
         if st.session_state["current_file_name"] != current_file_name:
             # 清除旧的推理结果
-            keys_to_clear = [
-                "detections",
-                "stats",
-                "corrected_detections",
-                "corrected_stats",
-                "correction_stats",
-                "result",
-                "input_path",
-                "image_shape",
-            ]
-            for key in keys_to_clear:
-                if key in st.session_state:
-                    del st.session_state[key]
+            for key in _RESULT_STATE_KEYS:
+                st.session_state.pop(key, None)
             
             # 更新当前文件名
             st.session_state["current_file_name"] = current_file_name
         
-        # 显示上传的图像信息
-        file_details = {
-            "文件名": uploaded_file.name,
-            "文件类型": uploaded_file.type,
-            "文件大小": f"{uploaded_file.size / 1024 / 1024:.2f} MB"
-        }
-        st.json(file_details)
+        # 上传的图像信息每次上传只生成一次（同名文件重新上传时 file_id 会变化）
+        cached_details = st.session_state.get("file_details")
+        if cached_details is None or cached_details[0] != uploaded_file.file_id:
+            cached_details = (
+                uploaded_file.file_id,
+                {
+                    "文件名": uploaded_file.name,
+                    "文件类型": uploaded_file.type,
+                    "文件大小": f"{uploaded_file.size / 1024 / 1024:.2f} MB"
+                },
+            )
+            st.session_state["file_details"] = cached_details
+        
+        # 显示上传的图像信息（元素需在每次重跑时输出，否则会从页面上移除）
+        st.json(cached_details[1])
         
-        # 保存上传的文件
-        input_path = config.INPUT_DIR / uploaded_file.name
-        with open(input_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+        # 保存上传的文件（分块写入，避免整份复制到内存）
+        # 文件名包含内容摘要，相同内容的图像可以复用推理结果
+        upload_name = Path(uploaded_file.name)
+        digest = _get_upload_digest(uploaded_file)
+        input_path = config.INPUT_DIR / f"{upload_name.stem}_{digest[:16]}{upload_name.suffix}"
+        # 同名且大小一致即为相同内容，跳过重写，同时保持 mtime 不变以命中各级缓存
+        if not input_path.exists() or input_path.stat().st_size != uploaded_file.size:
+            uploaded_file.seek(0)
+            with open(input_path, "wb") as f:
+                shutil.copyfileobj(uploaded_file, f, config.UPLOAD_CHUNK_SIZE)
         
         # 显示原图
         st.header("原始图像")
-        st.image(uploaded_file, use_column_width=True)
+        st.image(
+            _cached_original_preview(str(input_path), input_path.stat().st_mtime),
+            width="stretch",
+        )
         
         # 推理按钮
         col1, col2, col3 = st.columns([1, 1, 2])
         with col1:
-            run_inference = st.button("运行推理", type="primary", use_container_width=True)
+            run_inference = st.button("运行推理", type="primary", width="stretch")
         with col2:
-            clear_cache = st.button("清除缓存", use_container_width=True)
+            clear_cache = st.button("清除缓存", width="stretch")
         
+        container_monitor = _get_container_monitor()
         if clear_cache:
             st.cache_data.clear()
+            container_monitor.refresh()
             st.success("缓存已清除")
         
-        # 检查容器状态
-        container_status = check_container_status()
+        # 检查容器状态（读取后台线程最近一次的检查结果）
+        container_status = container_monitor.is_running
         if not container_status:
             st.error(
                 f"Docker 容器 '{config.CONTAINER_NAME}' 未运行。"
@@ -341,253 +1017,69 @@ def main() -> None:
             if not container_status:
                 st.error("无法运行推理：容器未运行")
             else:
-                with st.spinner("正在运行推理，请稍候..."):
-                    try:
-                        # 运行 Docker 推理
-                        output_dir = config.OUTPUT_DIR
-                        result = run_docker_inference(
-                            image_path=input_path,
-                            output_dir=output_dir,
-                            slice_height=slice_height,
-                            slice_width=slice_width,
-                            conf_threshold=conf_threshold,
-                            overlap_ratio=overlap_ratio,
-                        )
-                        
-                        # 解析结果
-                        detections = parse_sahi_results(result["json_path"])
-                        stats = get_detection_stats(detections)
-                        
-                        # 获取图像尺寸用于几何校正
-                        import cv2
-                        image = cv2.imread(str(input_path))
-                        image_shape = image.shape[:2]  # (height, width)
-                        
-                        # 应用几何校正
-                        corrected_detections, correction_stats = apply_geometric_correction(
-                            detections=detections,
-                            image_shape=image_shape,
-                            use_chain_search=use_chain_search,
-                            use_ransac=use_ransac if not use_chain_search else False,
-                            use_grid_fill=use_grid_fill if not use_chain_search else False,
-                            ransac_degree=ransac_degree if not use_chain_search else 2,
-                            ransac_threshold=ransac_threshold if not use_chain_search else 10.0,
-                            grid_spacing=grid_spacing if not use_chain_search else 50.0,
-                        )
-                        
-                        corrected_stats = get_detection_stats(corrected_detections)
-                        
-                        # 保存结果到 session state
-                        st.session_state["detections"] = detections
-                        st.session_state["stats"] = stats
-                        st.session_state["corrected_detections"] = corrected_detections
-                        st.session_state["corrected_stats"] = corrected_stats
-                        st.session_state["correction_stats"] = correction_stats
-                        st.session_state["result"] = result
-                        st.session_state["input_path"] = input_path
-                        st.session_state["image_shape"] = image_shape
-                        st.session_state["current_file_name"] = current_file_name  # 确保保存当前文件名
-                        
-                        st.success(
-                            f"推理完成！检测到 {stats['total']} 个目标，"
-                            f"几何校正后 {corrected_stats['total']} 个目标"
-                        )
-                        
-                    except Exception as e:
-                        logger.exception("推理失败")
-                        st.error(f"推理失败: {str(e)}")
-        
-        # 显示推理结果（只显示当前图像的推理结果）
-        if (
-            "detections" in st.session_state
-            and st.session_state["detections"]
-            and "current_file_name" in st.session_state
-            and st.session_state["current_file_name"] == current_file_name
-        ):
-            detections = st.session_state["detections"]
-            stats = st.session_state["stats"]
-            input_path = st.session_state["input_path"]
-            
-            # 推理结果可视化
-            st.header("推理结果")
-            
-            # 统计信息
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("总检测数", stats["total"])
-            with col2:
-                st.metric("高置信度", stats["high_confidence"])
-            with col3:
-                st.metric("中置信度", stats["medium_confidence"])
-            with col4:
-                st.metric("低置信度", stats["low_confidence"])
-            
-            st.metric("平均置信度", f"{stats['avg_confidence']:.3f}")
-            
-            # 创建可视化图像
-            try:
-                vis_image = create_visualization(
-                    image_path=input_path,
-                    detections=detections,
-                    thickness=2,
-                    show_label=False,
-                    show_confidence=False,
+                # 在后台线程中运行推理和几何校正，页面在推理期间保持可交互
+                future = _get_inference_executor().submit(
+                    _run_inference_pipeline,
+                    str(input_path),
+                    slice_height,
+                    slice_width,
+                    conf_threshold,
+                    overlap_ratio,
+                    use_chain_search,
+                    use_ransac if not use_chain_search else False,
+                    use_grid_fill if not use_chain_search else False,
+                    ransac_degree if not use_chain_search else 2,
+                    ransac_threshold if not use_chain_search else 10.0,
+                    grid_spacing if not use_chain_search else 50.0,
                 )
-                
-                # 转换为 PIL 图像用于 Streamlit 显示
-                pil_image = image_to_pil(vis_image)
-                
-                # 显示可视化结果
-                st.image(pil_image, use_column_width=True, caption="推理结果可视化")
-                
-                # 下载按钮
-                from io import BytesIO
-                import json
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    buf = BytesIO()
-                    pil_image.save(buf, format="PNG")
-                    st.download_button(
-                        label="下载推理结果图像",
-                        data=buf.getvalue(),
-                        file_name=f"{Path(input_path).stem}_inference.png",
-                        mime="image/png",
-                        use_container_width=True,
-                    )
-                
-                with col2:
-                    # 导出 JSON 结果
-                    json_data = {
-                        "image": str(input_path),
-                        "detections": [det.to_dict() for det in detections],
-                        "stats": stats,
-                    }
-                    json_str = json.dumps(json_data, indent=2, ensure_ascii=False)
-                    st.download_button(
-                        label="导出 JSON 结果",
-                        data=json_str.encode("utf-8"),
-                        file_name=f"{Path(input_path).stem}_inference.json",
-                        mime="application/json",
-                        use_container_width=True,
-                    )
-                
-            except Exception as e:
-                logger.exception("可视化失败")
-                st.error(f"可视化失败: {str(e)}")
-        
-        # 几何校正结果（只显示当前图像的校正结果）
-        st.header("几何校正结果")
-        if (
-            "corrected_detections" in st.session_state
-            and "current_file_name" in st.session_state
-            and st.session_state["current_file_name"] == current_file_name
-        ):
-            corrected_detections = st.session_state["corrected_detections"]
-            corrected_stats = st.session_state["corrected_stats"]
-            correction_stats = st.session_state["correction_stats"]
-            input_path = st.session_state["input_path"]
-            
-            # 校正统计信息
-            st.subheader("校正统计")
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("原始检测数", correction_stats["original_count"])
-            with col2:
-                st.metric("校正后检测数", correction_stats["corrected_count"])
-            with col3:
-                delta = correction_stats["added_count"] - correction_stats["removed_count"]
-                st.metric(
-                    "变化",
-                    f"{delta:+d}",
-                    delta=delta,
-                )
-            with col4:
-                st.metric("新增检测", correction_stats["added_count"])
-            
-            # 校正后统计信息
-            st.subheader("校正后统计")
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("总检测数", corrected_stats["total"])
-            with col2:
-                st.metric("高置信度", corrected_stats["high_confidence"])
-            with col3:
-                st.metric("中置信度", corrected_stats["medium_confidence"])
-            with col4:
-                st.metric("低置信度", corrected_stats["low_confidence"])
-            
-            st.metric("平均置信度", f"{corrected_stats['avg_confidence']:.3f}")
-            
-            # 创建校正后的可视化图像
+                st.session_state["inference_task"] = (input_path, future)
+        
+        inference_task = st.session_state.get("inference_task")
+        if inference_task is not None and inference_task[1].done():
+            st.session_state.pop("inference_task")
+            task_input_path, future = inference_task
             try:
-                corrected_vis_image = create_visualization(
-                    image_path=input_path,
-                    detections=corrected_detections,
-                    thickness=2,
-                    show_label=False,
-                    show_confidence=False,
-                )
-                
-                # 转换为 PIL 图像用于 Streamlit 显示
-                corrected_pil_image = image_to_pil(corrected_vis_image)
-                
-                # 显示校正后的可视化结果
-                st.subheader("校正后可视化")
-                st.image(
-                    corrected_pil_image,
-                    use_column_width=True,
-                    caption="几何校正后的检测结果",
-                )
+                (
+                    detections,
+                    stats,
+                    corrected_detections,
+                    correction_stats,
+                    corrected_stats,
+                ) = future.result()
                 
-                # 下载按钮
-                from io import BytesIO
-                import json
+                # 保存结果到 session state
+                st.session_state["detections"] = detections
+                st.session_state["stats"] = stats
+                st.session_state["corrected_detections"] = corrected_detections
+                # 预先转换为字典列表，两个 JSON 导出共用
+                st.session_state["detection_dicts"] = [det.to_dict() for det in detections]
+                st.session_state["corrected_detection_dicts"] = [
+                    det.to_dict() for det in corrected_detections
+                ]
+                st.session_state["corrected_stats"] = corrected_stats
+                st.session_state["correction_stats"] = correction_stats
+                st.session_state["input_path"] = task_input_path
+                st.session_state["current_file_name"] = current_file_name  # 确保保存当前文件名
                 
-                col1, col2 = st.columns(2)
+                # 新的推理结果需要重新生成可视化图像
+                st.session_state.pop("vis_inference", None)
+                st.session_state.pop("vis_corrected", None)
+                st.session_state["inference_done"] = True
                 
-                with col1:
-                    buf = BytesIO()
-                    corrected_pil_image.save(buf, format="PNG")
-                    st.download_button(
-                        label="下载校正结果图像",
-                        data=buf.getvalue(),
-                        file_name=f"{Path(input_path).stem}_corrected.png",
-                        mime="image/png",
-                        use_container_width=True,
-                    )
-                
-                with col2:
-                    # 导出 JSON 结果
-                    json_data = {
-                        "image": str(input_path),
-                        "original_detections": [det.to_dict() for det in st.session_state["detections"]],
-                        "corrected_detections": [det.to_dict() for det in corrected_detections],
-                        "correction_stats": correction_stats,
-                        "corrected_stats": corrected_stats,
-                    }
-                    json_str = json.dumps(json_data, indent=2, ensure_ascii=False)
-                    st.download_button(
-                        label="导出校正 JSON 结果",
-                        data=json_str.encode("utf-8"),
-                        file_name=f"{Path(input_path).stem}_corrected.json",
-                        mime="application/json",
-                        use_container_width=True,
-                    )
+                st.success(
+                    f"推理完成！检测到 {stats['total']} 个目标，"
+                    f"几何校正后 {corrected_stats['total']} 个目标"
+                )
                 
             except Exception as e:
-                logger.exception("校正结果可视化失败")
-                st.error(f"校正结果可视化失败: {str(e)}")
-        elif (
-            "detections" in st.session_state
-            and "current_file_name" in st.session_state
-            and st.session_state["current_file_name"] == current_file_name
-        ):
-            st.info("几何校正已完成，但结果未保存到 session state")
-        else:
-            # 不显示任何信息，因为可能是旧图像的结果
-            pass
+                logger.exception("推理失败")
+                st.error(f"推理失败: {str(e)}")
+        elif inference_task is not None:
+            _render_inference_progress()
+        
+        # 显示推理结果和几何校正结果（只显示当前图像的结果）
+        _render_inference_results(current_file_name)
+        _render_correction_results(current_file_name)
     
     else:
         st.info("请上传一张图像开始处理")
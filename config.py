@@ -1,7 +1,9 @@
 """配置文件 - 管理应用的所有配置项."""
 
+import json
 import os
-from pathlib import Path
+import subprocess
+from pathlib import Path, PurePosixPath
 from typing import Optional
 
 # ==================== Docker 配置 ====================
@@ -43,25 +45,38 @@ OUTPUT_DIR: Path = PROJECT_ROOT / "output"
 # Docker 容器内的路径映射
 DOCKER_INPUT_DIR: str = "/app/input"
 DOCKER_OUTPUT_DIR: str = "/app/output"
+_DOCKER_INPUT_PREFIX = PurePosixPath(DOCKER_INPUT_DIR)
+_DOCKER_OUTPUT_PREFIX = PurePosixPath(DOCKER_OUTPUT_DIR)
 
 # ==================== 文件配置 ====================
 ALLOWED_IMAGE_EXTENSIONS: tuple[str, ...] = (".png", ".jpg", ".jpeg", ".PNG", ".JPG", ".JPEG")
 MAX_IMAGE_SIZE_MB: int = 100  # 最大图像大小（MB）
+UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 上传文件写盘的分块大小（字节）
 
 # ==================== UI 配置 ====================
 STREAMLIT_PAGE_TITLE: str = "PV Pile Integration System"
 STREAMLIT_PAGE_ICON: str = "🔋"
+PNG_COMPRESS_LEVEL: int = 1  # 可视化 PNG 压缩级别（0-9，越低编码越快、文件越大）
+PREVIEW_JPEG_QUALITY: int = 85  # 页面预览图 JPEG 质量
+PREVIEW_MAX_SIZE: int = 1600  # 页面预览图长边最大像素（下载仍使用原始分辨率）
 
 # ==================== 性能配置 ====================
 DOCKER_TIMEOUT_SECONDS: int = 600  # Docker 命令超时时间（10分钟，基础值）
 DOCKER_TIMEOUT_MAX_SECONDS: int = 1800  # Docker 命令最大超时时间（30分钟，用于超大图像）
 MAX_WORKERS: int = 4  # 最大并发工作线程数
+CONTAINER_STATUS_TTL_SECONDS: float = 5.0  # 容器状态检查结果缓存时间（秒）
+INFERENCE_WORKERS: int = 2  # 后台推理任务的最大并发数
+INFERENCE_POLL_INTERVAL_SECONDS: float = 1.0  # 后台推理完成状态的检查间隔（秒）
 
 # ==================== 日志配置 ====================
 LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 LOG_DIR: Path = PROJECT_ROOT / "logs"
 
 # ==================== 辅助函数 ====================
+# 容器挂载目录缓存：容器名称 -> {容器内路径: 宿主机路径}
+_mount_cache: dict[str, dict[str, Path]] = {}
+
+
 def ensure_directories() -> None:
     """确保必要的目录存在."""
     INPUT_DIR.mkdir(exist_ok=True)
@@ -79,40 +94,74 @@ def get_docker_input_path(local_path: Path) -> str:
     Returns:
         Docker 容器内的路径
     """
+    # 常见情况：文件直接位于 INPUT_DIR 下，无需逐级计算相对路径
+    if local_path.parent == INPUT_DIR:
+        return str(_DOCKER_INPUT_PREFIX / local_path.name)
+    
     try:
         relative_path = local_path.relative_to(INPUT_DIR)
-        return str(Path(DOCKER_INPUT_DIR) / relative_path)
+        return str(_DOCKER_INPUT_PREFIX / relative_path.as_posix())
     except ValueError:
         # 如果路径不在 INPUT_DIR 下，使用文件名
-        return str(Path(DOCKER_INPUT_DIR) / local_path.name)
+        return str(_DOCKER_INPUT_PREFIX / local_path.name)
 
 
-def get_mounted_input_dir() -> Optional[Path]:
+def invalidate_mount_cache() -> None:
+    """清除容器挂载目录的缓存（容器重建或挂载变化后调用）."""
+    _mount_cache.clear()
+
+
+def _inspect_mounts() -> dict[str, Path]:
     """
-    获取容器挂载的输入目录路径（宿主机路径）.
+    查询容器的所有挂载（一次 docker inspect 同时获得输入和输出目录，成功的结果会被缓存）.
+    
+    容器的挂载在其生命周期内不会变化，因此只需查询一次；
+    查询失败时不缓存，以便容器启动后可以重新查询。
     
     Returns:
-        挂载的输入目录路径，如果无法确定则返回 None
+        容器内路径到宿主机路径的映射，查询失败时返回空字典
     """
+    cached = _mount_cache.get(CONTAINER_NAME)
+    if cached is not None:
+        return cached
+    
     try:
-        import subprocess
         result = subprocess.run(
-            ["docker", "inspect", CONTAINER_NAME, "--format", "{{range .Mounts}}{{if eq .Destination \"/app/input\"}}{{.Source}}{{end}}{{end}}"],
+            ["docker", "inspect", CONTAINER_NAME, "--format", "{{json .Mounts}}"],
             capture_output=True,
             text=True,
             timeout=5,
         )
         if result.returncode == 0 and result.stdout.strip():
-            return Path(result.stdout.strip())
+            mounts = {
+                mount["Destination"]: Path(mount["Source"])
+                for mount in json.loads(result.stdout)
+                if mount.get("Destination") and mount.get("Source")
+            }
+            _mount_cache[CONTAINER_NAME] = mounts
+            return mounts
     except Exception:
         pass
     
-    # 默认尝试常见的挂载路径
-    default_paths = [
-        Path("/Users/leo/code/SAHI_inf/pv_pile/input"),
-        Path("/Users/leo/code/pv_pile/input"),
-    ]
+    return {}
+
+
+def _get_mounted_dir(destination: str, default_paths: tuple[Path, ...]) -> Optional[Path]:
+    """
+    获取容器中某个目录挂载的宿主机路径.
+    
+    Args:
+        destination: 容器内的挂载目标路径
+        default_paths: 无法查询时依次尝试的默认宿主机路径
+        
+    Returns:
+        挂载的宿主机路径，如果无法确定则返回 None
+    """
+    mounted_dir = _inspect_mounts().get(destination)
+    if mounted_dir is not None:
+        return mounted_dir
     
+    # 默认尝试常见的挂载路径
     for path in default_paths:
         if path.exists():
             return path
@@ -120,6 +169,22 @@ def get_mounted_input_dir() -> Optional[Path]:
     return None
 
 
+def get_mounted_input_dir() -> Optional[Path]:
+    """
+    获取容器挂载的输入目录路径（宿主机路径）.
+    
+    Returns:
+        挂载的输入目录路径，如果无法确定则返回 None
+    """
+    return _get_mounted_dir(
+        DOCKER_INPUT_DIR,
+        (
+            Path("/Users/leo/code/SAHI_inf/pv_pile/input"),
+            Path("/Users/leo/code/pv_pile/input"),
+        ),
+    )
+
+
 def get_docker_output_path(local_path: Path) -> str:
     """
     将本地路径转换为 Docker 容器内的输出路径.
@@ -130,8 +195,11 @@ def get_docker_output_path(local_path: Path) -> str:
     Returns:
         Docker 容器内的路径
     """
+    if local_path.parent == OUTPUT_DIR:
+        return str(_DOCKER_OUTPUT_PREFIX / local_path.name)
+    
     relative_path = local_path.relative_to(OUTPUT_DIR)
-    return str(Path(DOCKER_OUTPUT_DIR) / relative_path)
+    return str(_DOCKER_OUTPUT_PREFIX / relative_path.as_posix())
 
 
 def get_mounted_output_dir() -> Optional[Path]:
@@ -141,28 +209,10 @@ def get_mounted_output_dir() -> Optional[Path]:
     Returns:
         挂载的输出目录路径，如果无法确定则返回 None
     """
-    try:
-        import subprocess
-        result = subprocess.run(
-            ["docker", "inspect", CONTAINER_NAME, "--format", "{{range .Mounts}}{{if eq .Destination \"/app/output\"}}{{.Source}}{{end}}{{end}}"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            return Path(result.stdout.strip())
-    except Exception:
-        pass
-    
-    # 默认尝试常见的挂载路径
-    default_paths = [
-        Path("/Users/leo/code/SAHI_inf/pv_pile/output"),
-        Path("/Users/leo/code/pv_pile/output"),
-    ]
-    
-    for path in default_paths:
-        if path.exists():
-            return path
-    
-    return None
-
+    return _get_mounted_dir(
+        DOCKER_OUTPUT_DIR,
+        (
+            Path("/Users/leo/code/SAHI_inf/pv_pile/output"),
+            Path("/Users/leo/code/pv_pile/output"),
+        ),
+    )
@@ -1,8 +1,10 @@
 """几何校正模块 - 集成 SolarGeoFix 几何校正."""
 
 from src.geometry.corrector import (
+    CORRECTION_VERSION,
     apply_chain_based_correction,
     apply_geometric_correction,
+    apply_geometric_correction_batch,
     complete_chains,
     detections_to_sgf_format,
     fill_grid,
@@ -12,7 +14,9 @@ from src.geometry.corrector import (
 )
 
 __all__ = [
+    "CORRECTION_VERSION",
     "apply_geometric_correction",
+    "apply_geometric_correction_batch",
     "apply_chain_based_correction",
     "detections_to_sgf_format",
     "sgf_format_to_detections",
@@ -1,19 +1,164 @@
 """几何校正模块 - 使用 RANSAC 回归和网格填充算法修正检测结果."""
 
 import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from typing import Any, Optional
 
 import numpy as np
 from scipy.spatial import cKDTree
-from scipy.spatial.distance import cdist
 from sklearn.linear_model import RANSACRegressor
-from sklearn.preprocessing import PolynomialFeatures
 
-from src.inference.models import Detection
+try:
+    from numba import njit
+except ImportError:  # numba 为可选依赖，未安装时使用 NumPy 向量化实现
+    njit = None
+
+import config
+from src.inference.models import Detection, DetectionBatch
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 校正算法版本：修改会改变校正结果的算法时递增，使持久化的校正结果缓存失效
+CORRECTION_VERSION = 2
+
+# 二次 RANSAC 每批试验的残差矩阵元素上限（点数 × 试验数），限制大点集时的内存占用
+_RANSAC_BATCH_ELEMENTS = 1 << 20
+
+
+def _score_quadratic_trials_numpy(
+    x: np.ndarray,
+    y: np.ndarray,
+    coefs: np.ndarray,
+    residual_threshold: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    计算每次 RANSAC 试验的内点数和内点残差和（NumPy 向量化实现，按批计算残差矩阵）.
+    
+    Args:
+        x: 自变量，形状为 (n_points,)
+        y: 因变量，形状为 (n_points,)
+        coefs: 每次试验的升幂多项式系数，形状为 (3, n_trials)
+        residual_threshold: 残差阈值
+        
+    Returns:
+        (每次试验的内点数, 每次试验的内点残差和)
+    """
+    n_trials = coefs.shape[1]
+    counts = np.empty(n_trials, dtype=np.int64)
+    errors = np.empty(n_trials, dtype=np.float64)
+    vander = np.vander(x, N=3, increasing=True)
+    
+    batch = max(1, _RANSAC_BATCH_ELEMENTS // len(x))
+    for start in range(0, n_trials, batch):
+        stop = start + batch
+        residuals = np.abs(y[:, np.newaxis] - vander @ coefs[:, start:stop])
+        inliers = residuals <= residual_threshold
+        counts[start:stop] = np.count_nonzero(inliers, axis=0)
+        errors[start:stop] = np.where(inliers, residuals, 0.0).sum(axis=0)
+    
+    return counts, errors
+
+
+def _score_quadratic_trials_loop(
+    x: np.ndarray,
+    y: np.ndarray,
+    coefs: np.ndarray,
+    residual_threshold: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    计算每次 RANSAC 试验的内点数和内点残差和（逐点循环，供 numba 编译）.
+    
+    与 _score_quadratic_trials_numpy 结果一致，但求值、比较和累加在同一个循环中完成，
+    不需要 (n_points, n_trials) 的中间矩阵。
+    
+    Args:
+        x: 自变量，形状为 (n_points,)
+        y: 因变量，形状为 (n_points,)
+        coefs: 每次试验的升幂多项式系数，形状为 (3, n_trials)
+        residual_threshold: 残差阈值
+        
+    Returns:
+        (每次试验的内点数, 每次试验的内点残差和)
+    """
+    n_trials = coefs.shape[1]
+    counts = np.zeros(n_trials, dtype=np.int64)
+    errors = np.zeros(n_trials, dtype=np.float64)
+    
+    for t in range(n_trials):
+        c0 = coefs[0, t]
+        c1 = coefs[1, t]
+        c2 = coefs[2, t]
+        count = 0
+        error = 0.0
+        for i in range(x.shape[0]):
+            residual = abs(y[i] - (c0 + (c1 + c2 * x[i]) * x[i]))
+            if residual <= residual_threshold:
+                count += 1
+                error += residual
+        counts[t] = count
+        errors[t] = error
+    
+    return counts, errors
+
+
+# 安装了 numba 时编译逐点循环版本，否则使用 NumPy 向量化版本
+# 不开启完整的 fastmath：近似退化的抽样可能产生 inf/nan 系数，只允许重排累加以便向量化
+if njit is not None:
+    _score_quadratic_trials = njit(cache=True, fastmath={"reassoc", "contract"})(
+        _score_quadratic_trials_loop
+    )
+else:
+    _score_quadratic_trials = _score_quadratic_trials_numpy
+
+
+def _extract_centers(detections: list[Detection]) -> np.ndarray:
+    """
+    提取检测结果的中心点坐标.
+    
+    Args:
+        detections: 检测结果列表
+        
+    Returns:
+        中心点坐标数组，形状为 (n_points, 2)，每行为 (x, y)
+    """
+    count = len(detections)
+    x_centers = np.fromiter((det.x_center for det in detections), dtype=np.float64, count=count)
+    y_centers = np.fromiter((det.y_center for det in detections), dtype=np.float64, count=count)
+    return np.column_stack([x_centers, y_centers])
+
+
+def _median_spacing(points: np.ndarray, tree: Optional[cKDTree] = None) -> float:
+    """
+    计算基准间距：每个点到最近的不重合点的距离的中位数.
+    
+    使用 KD-Tree 最近邻查询（O(n log n)），无需构建 O(n²) 的完整距离矩阵。
+    
+    Args:
+        points: 点坐标数组，形状为 (n_points, 2)
+        tree: 已构建的 points 的 KD-Tree（可选，提供时复用）
+        
+    Returns:
+        基准间距（像素）
+    """
+    if tree is None:
+        tree = cKDTree(points)
+    
+    # k=2：第一个邻居是点自身，第二个是最近邻
+    distances, _ = tree.query(points, k=2, workers=-1)
+    min_distances = distances[:, 1]
+    
+    # 与重合点的距离为 0，不计入间距：对这些点在去重后的点集上重新查询
+    duplicated = min_distances == 0
+    if duplicated.any():
+        unique_tree = cKDTree(np.unique(points, axis=0))
+        unique_distances, _ = unique_tree.query(points[duplicated], k=2, workers=-1)
+        min_distances[duplicated] = unique_distances[:, 1]
+    
+    return float(np.median(min_distances))
+
 
 def detections_to_sgf_format(detections: list[Detection]) -> list[dict[str, float]]:
     """
@@ -42,25 +187,26 @@ def sgf_format_to_detections(
         检测结果列表
     """
     detections = []
+    append = detections.append
     
     for item in sgf_data:
         x_center = item["x_center"]
         y_center = item["y_center"]
         width = item["width"]
         height = item["height"]
-        confidence = item.get("confidence", 0.5)
-        
-        # 转换为 COCO 格式 bbox [x, y, width, height]
-        x = x_center - width / 2.0
-        y = y_center - height / 2.0
         
-        detection = Detection(
-            bbox=[x, y, width, height],
-            confidence=confidence,
-            category_id=category_id,
-        )
-        
-        detections.append(detection)
+        # 转换为 COCO 格式 bbox [x, y, width, height]，并直接传入已知的中心点，
+        # 避免 __post_init__ 再从 bbox 反算。按字段顺序使用位置参数
+        # （bbox, confidence, category_id, category_name, x_center, y_center），
+        # 大量构造时比关键字参数快约一倍
+        append(Detection(
+            [x_center - width / 2.0, y_center - height / 2.0, width, height],
+            item.get("confidence", 0.5),
+            category_id,
+            None,
+            x_center,
+            y_center,
+        ))
     
     return detections
 
@@ -78,22 +224,19 @@ def detect_main_direction(points: np.ndarray) -> str:
     if len(points) < 3:
         return "mixed"
     
-    from sklearn.decomposition import PCA
-    
-    # 标准化点坐标（减去均值）
-    points_centered = points - points.mean(axis=0)
+    # 主成分分析：2×2 协方差矩阵的特征分解（np.cov 已减去均值，eigh 按特征值升序返回）
+    eigenvalues, eigenvectors = np.linalg.eigh(np.cov(points, rowvar=False))
+    total_variance = eigenvalues.sum()
+    if total_variance <= 0:
+        return "mixed"  # 所有点重合，没有方向
     
-    # PCA 分析
-    pca = PCA(n_components=2)
-    pca.fit(points_centered)
-    
-    # 主成分的方差比
-    variance_ratio = pca.explained_variance_ratio_
+    # 第一主成分的方差比
+    variance_ratio = eigenvalues[-1] / total_variance
     
     # 如果第一个主成分的方差占比 > 0.7，说明主要沿一个方向分布
-    if variance_ratio[0] > 0.7:
+    if variance_ratio > 0.7:
         # 判断是横向还是纵向
-        first_pc = pca.components_[0]
+        first_pc = eigenvectors[:, -1]
         if abs(first_pc[0]) > abs(first_pc[1]):
             return "horizontal"  # 主要沿 X 轴（横向）
         else:
@@ -102,6 +245,71 @@ def detect_main_direction(points: np.ndarray) -> str:
     return "mixed"  # 混合方向
 
 
+def _ransac_quadratic_1d(
+    x: np.ndarray,
+    y: np.ndarray,
+    residual_threshold: float,
+    max_trials: int,
+    rng: np.random.Generator,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    一元二次多项式 y = c0 + c1·x + c2·x² 的 RANSAC 拟合（degree=2 的专用实现）.
+    
+    每次试验随机抽取 3 个点，用闭式解（牛顿差商）求出经过这 3 点的二次曲线，
+    所有试验一次性评估（安装 numba 时使用编译后的循环），取内点最多
+    （并列时内点残差和最小）的试验，最后用其全部内点做最小二乘重拟合。
+    
+    抽样与选择规则与 sklearn 的 RANSACRegressor 不同（每次抽 3 个点求精确解，
+    并列时比较残差和而不是 R²），结果不逐点一致：内点与离群点界限分明时一致集相同，
+    噪声接近残差阈值时一致集可能相差几个点，拟合曲线随之有小幅偏差。
+    
+    Args:
+        x: 自变量，形状为 (n_points,)
+        y: 因变量，形状为 (n_points,)
+        residual_threshold: 残差阈值，残差不超过该值的点视为内点
+        max_trials: 随机抽样的试验次数
+        rng: 随机数生成器
+        
+    Returns:
+        (升幂排列的多项式系数 [c0, c1, c2], 内点掩码)
+        
+    Raises:
+        ValueError: 如果所有抽样都退化（自变量重复）或找不到有效的一致集
+    """
+    n_points = len(x)
+    vander = np.vander(x, N=3, increasing=True)
+    
+    # 抽样并求解每次试验的二次曲线系数，自变量重复的退化样本直接丢弃
+    samples = rng.integers(0, n_points, size=(max_trials, 3))
+    x0, x1, x2 = x[samples].T
+    y0, y1, y2 = y[samples].T
+    valid = (x0 != x1) & (x0 != x2) & (x1 != x2)
+    x0, x1, x2 = x0[valid], x1[valid], x2[valid]
+    y0, y1, y2 = y0[valid], y1[valid], y2[valid]
+    
+    if len(x0) == 0:
+        raise ValueError("RANSAC 抽样全部退化，无法拟合二次曲线")
+    
+    slope01 = (y1 - y0) / (x1 - x0)
+    slope12 = (y2 - y1) / (x2 - x1)
+    c2 = (slope12 - slope01) / (x2 - x0)
+    c1 = slope01 - c2 * (x0 + x1)
+    c0 = y0 - (c1 + c2 * x0) * x0
+    coefs = np.stack([c0, c1, c2])
+    
+    # 内点数最多的试验最优，并列时取内点残差和最小的
+    counts, errors = _score_quadratic_trials(x, y, coefs, residual_threshold)
+    best = np.lexsort((errors, -counts))[0]
+    if counts[best] < 3:
+        raise ValueError("RANSAC 未找到有效的一致集")
+    best_mask = np.abs(y - vander @ coefs[:, best]) <= residual_threshold
+    
+    # 用最优试验的全部内点重拟合
+    coef = np.linalg.lstsq(vander[best_mask], y[best_mask], rcond=None)[0]
+    
+    return coef, best_mask
+
+
 def fit_grid_with_ransac(
     points: np.ndarray,
     degree: int = 2,
@@ -122,7 +330,8 @@ def fit_grid_with_ransac(
         max_correction_distance: 最大校正距离（像素），超过此距离的点不移动
         
     Returns:
-        (拟合模型, 拟合后的点坐标)
+        (拟合模型, 拟合后的点坐标)。degree=2 时拟合模型为升幂排列的多项式系数数组，
+        其他次数为 sklearn 的 RANSACRegressor
     """
     if len(points) < 3:
         logger.warning("点数不足，无法进行 RANSAC 拟合")
@@ -132,75 +341,77 @@ def fit_grid_with_ransac(
     direction = "horizontal"
     if use_adaptive_direction:
         direction = detect_main_direction(points)
-        logger.debug(f"检测到主要方向: {direction}")
+        logger.debug("检测到主要方向: %s", direction)
     
-    # 根据方向选择拟合轴
+    # 根据方向选择拟合轴：axis 为被拟合（会被校正）的坐标列
     if direction == "vertical":
         # 垂直列：使用 x = f(y) 拟合
-        x = points[:, 1].reshape(-1, 1)  # 使用 y 作为输入
-        y = points[:, 0]                  # 使用 x 作为输出
-        swap_axes = True
+        axis = 0
     else:
         # 水平列或混合：使用 y = f(x) 拟合
-        x = points[:, 0].reshape(-1, 1)  # 使用 x 作为输入
-        y = points[:, 1]                  # 使用 y 作为输出
-        swap_axes = False
-    
-    # 创建多项式特征
-    poly_features = PolynomialFeatures(degree=degree, include_bias=True)
-    x_poly = poly_features.fit_transform(x)
-    
-    # 使用 RANSAC 回归
-    ransac = RANSACRegressor(
-        residual_threshold=residual_threshold,
-        max_trials=max_trials,
-        random_state=42,
-    )
-    
-    ransac.fit(x_poly, y)
-    
-    # 预测拟合后的坐标
-    y_pred = ransac.predict(x_poly)
-    
-    # 构建拟合后的点坐标
-    if swap_axes:
-        fitted_points = np.column_stack([y_pred, x.flatten()])
+        axis = 1
+    x = points[:, 1 - axis]
+    y = points[:, axis]
+    
+    # 创建多项式特征 [1, x, x², ...]（单变量时等价于 PolynomialFeatures，但无需其通用组合逻辑）
+    x_poly = np.vander(x, N=degree + 1, increasing=True)
+    
+    # 使用 RANSAC 回归，预测拟合后的坐标（只有被拟合的一列会变化）
+    if degree == 2:
+        # 默认的二次拟合使用专用实现，避免 sklearn 每次试验的通用校验与调度开销
+        # （与 sklearn 的结果不逐点一致，见 _ransac_quadratic_1d）
+        model, _ = _ransac_quadratic_1d(
+            x, y, residual_threshold, max_trials, np.random.default_rng(42)
+        )
+        y_pred = x_poly @ model
     else:
-        fitted_points = np.column_stack([x.flatten(), y_pred])
+        model = RANSACRegressor(
+            residual_threshold=residual_threshold,
+            max_trials=max_trials,
+            random_state=42,
+        )
+        model.fit(x_poly, y)
+        y_pred = model.predict(x_poly)
     
     # 改进策略：不强制移动所有点，只对明显偏离的点进行校正
-    # 计算原始点到拟合点的距离
-    from scipy.spatial.distance import cdist
-    distances = np.linalg.norm(points - fitted_points, axis=1)
+    # 拟合只改变一个坐标，原始点到拟合点的距离即该坐标的残差，无需构建完整的拟合点数组
+    distances = np.abs(y - y_pred)
     
     # 对于距离超过 max_correction_distance 的点，保持原始位置
     # 这些点可能是误检或不在拟合模型中的点
     correction_mask = distances <= max_correction_distance
+    corrected_count = int(np.count_nonzero(correction_mask))
     
-    if np.sum(correction_mask) < len(points) * 0.5:
+    if corrected_count < len(points) * 0.5:
         # 如果超过一半的点都需要大幅移动，说明拟合模型可能不准确
         logger.warning(
-            f"拟合模型可能不准确：只有 {np.sum(correction_mask)}/{len(points)} "
-            f"个点在合理范围内，保持原始点位置"
+            "拟合模型可能不准确：只有 %d/%d 个点在合理范围内，保持原始点位置",
+            corrected_count,
+            len(points),
         )
-        return ransac, points
+        return model, points
     
-    # 只校正距离合理的点
+    # 只校正距离合理的点（直接写回被拟合的一列）
     corrected_points = points.copy()
-    corrected_points[correction_mask] = fitted_points[correction_mask]
-    
-    logger.debug(
-        f"RANSAC 拟合完成：校正 {np.sum(correction_mask)}/{len(points)} 个点，"
-        f"平均偏移: {distances[correction_mask].mean():.1f}px"
-    )
+    corrected_points[correction_mask, axis] = y_pred[correction_mask]
+    
+    # 平均偏移需要额外计算，仅在输出 DEBUG 日志时求值
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "RANSAC 拟合完成：校正 %d/%d 个点，平均偏移: %.1fpx",
+            corrected_count,
+            len(points),
+            distances[correction_mask].mean(),
+        )
     
-    return ransac, corrected_points
+    return model, corrected_points
 
 
 def fill_grid(
     points: np.ndarray,
     image_shape: tuple[int, int],
     grid_spacing: float = 50.0,
+    tree: Optional[cKDTree] = None,
 ) -> np.ndarray:
     """
     使用网格填充算法生成缺失的检测点.
@@ -211,6 +422,7 @@ def fill_grid(
         points: 现有点坐标数组，形状为 (n_points, 2)
         image_shape: 图像尺寸 (height, width)
         grid_spacing: 网格间距（像素）
+        tree: 已构建的 points 的 KD-Tree（可选，提供时复用，不再重新构建）
         
     Returns:
         填充后的点坐标数组
@@ -238,15 +450,16 @@ def fill_grid(
         logger.warning("边界框太小，无法生成网格")
         return points
     
-    # 生成网格点
-    xx, yy = np.meshgrid(x_grid, y_grid)
-    grid_points = np.column_stack([xx.ravel(), yy.ravel()])
-    
-    # 计算每个网格点到最近现有点的距离
-    from scipy.spatial.distance import cdist
+    # 生成网格点（一次分配，通过广播填充 x/y，顺序与 meshgrid 展开一致）
+    grid_points = np.empty((len(y_grid), len(x_grid), 2), dtype=np.float64)
+    grid_points[..., 0] = x_grid
+    grid_points[..., 1] = y_grid[:, np.newaxis]
+    grid_points = grid_points.reshape(-1, 2)
     
-    distances = cdist(grid_points, points)
-    min_distances = np.min(distances, axis=1)
+    # 计算每个网格点到最近现有点的距离（KD-Tree 最近邻查询，无需构建完整距离矩阵）
+    if tree is None:
+        tree = cKDTree(points)
+    min_distances, _ = tree.query(grid_points, k=1, workers=-1)
     
     # 只保留距离现有点在合理范围内的点（可能是缺失的检测）
     # 同时排除距离太近的点（避免重复）
@@ -261,18 +474,106 @@ def fill_grid(
     if len(new_points) > 0:
         # 合并现有点和新点
         all_points = np.vstack([points, new_points])
-        logger.debug(f"网格填充: 原始 {len(points)} 个点，新增 {len(new_points)} 个点")
+        logger.debug("网格填充: 原始 %d 个点，新增 %d 个点", len(points), len(new_points))
     else:
         all_points = points
     
     return all_points
 
 
+def _walk_chains_loop(
+    xs: Any,
+    ys: Any,
+    indptr: Any,
+    indices: Any,
+    cos_threshold: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    沿邻接图逐点延伸，把所有点依次划分为链（逐点循环，供 numba 编译）.
+    
+    从每个未访问的点出发向前延伸：链中已有至少两个点时，优先走向与当前前进方向
+    夹角余弦不小于 cos_threshold（即夹角不超过角度阈值）的第一个未访问邻居；否则（或没有这样的邻居）走向
+    第一个未访问邻居；没有未访问邻居时该链结束。
+    
+    Args:
+        xs: 点的 x 坐标序列
+        ys: 点的 y 坐标序列
+        indptr: CSR 邻接表的行偏移，点 i 的邻居为 indices[indptr[i]:indptr[i + 1]]
+        indices: CSR 邻接表的邻居索引（同一点的邻居按优先顺序排列）
+        cos_threshold: 角度阈值的余弦值
+        
+    Returns:
+        (按链依次排列的点索引, 每条链的长度)
+    """
+    n_points = len(xs)
+    visited = np.zeros(n_points, dtype=np.bool_)
+    order = np.empty(n_points, dtype=np.int64)
+    lengths = np.empty(n_points, dtype=np.int64)
+    n_chains = 0
+    position = 0
+    
+    for start in range(n_points):
+        if visited[start]:
+            continue
+        
+        chain_start = position
+        previous = -1
+        current = start
+        while current >= 0:
+            visited[current] = True
+            order[position] = current
+            position += 1
+            following = -1
+            
+            # 检查角度一致性：沿当前前进方向优先延伸
+            if previous >= 0:
+                dx1 = xs[current] - xs[previous]
+                dy1 = ys[current] - ys[previous]
+                norm1 = math.sqrt(dx1 * dx1 + dy1 * dy1) + 1e-8
+                ux1 = dx1 / norm1
+                uy1 = dy1 / norm1
+                
+                for k in range(indptr[current], indptr[current + 1]):
+                    neighbor = indices[k]
+                    if visited[neighbor]:
+                        continue
+                    dx2 = xs[neighbor] - xs[current]
+                    dy2 = ys[neighbor] - ys[current]
+                    norm2 = math.sqrt(dx2 * dx2 + dy2 * dy2) + 1e-8
+                    if ux1 * (dx2 / norm2) + uy1 * (dy2 / norm2) >= cos_threshold:
+                        following = neighbor
+                        break
+            
+            # 没有满足角度要求的下一跳，取第一个未访问的邻居
+            if following < 0:
+                for k in range(indptr[current], indptr[current + 1]):
+                    if not visited[indices[k]]:
+                        following = indices[k]
+                        break
+            
+            previous = current
+            current = following
+        
+        lengths[n_chains] = position - chain_start
+        n_chains += 1
+    
+    return order, lengths[:n_chains]
+
+
+# 安装了 numba 时编译逐点循环版本；否则以 Python 列表作为输入直接运行
+# （纯 Python 下逐元素访问列表比访问 NumPy 数组快得多）
+if njit is not None:
+    _walk_chains = njit(cache=True)(_walk_chains_loop)
+else:
+    _walk_chains = _walk_chains_loop
+
+
 def find_chains(
     points: np.ndarray,
     search_radius: float,
     angle_threshold: float = 15.0,
     min_chain_length: int = 3,
+    tree: Optional[cKDTree] = None,
 ) -> list[list[int]]:
     """
     使用链式搜索算法识别桩列（链）.
@@ -282,6 +583,7 @@ def find_chains(
         search_radius: 搜索半径（像素）
         angle_threshold: 角度阈值（度），向量夹角超过此值则断开连接
         min_chain_length: 最小链长度，长度小于此值的链将被过滤
+        tree: 已构建的 points 的 KD-Tree（可选，提供时复用，不再重新构建）
         
     Returns:
         链列表，每个链是点的索引列表
@@ -292,83 +594,55 @@ def find_chains(
     n_points = len(points)
     
     # 构建 KD-Tree 用于快速最近邻搜索
-    tree = cKDTree(points)
+    if tree is None:
+        tree = cKDTree(points)
     
-    # 构建邻接图
-    edges: dict[int, list[int]] = {i: [] for i in range(n_points)}
+    # 构建邻接图：一次并行查询所有点的半径邻居，展平后向量化计算距离
+    neighbor_lists = tree.query_ball_point(
+        points, search_radius, return_sorted=False, workers=-1
+    )
+    counts = np.fromiter(map(len, neighbor_lists), dtype=np.intp, count=n_points)
+    sources = np.repeat(np.arange(n_points), counts)
+    targets = np.concatenate(neighbor_lists).astype(np.intp, copy=False)
+    pair_vectors = points[targets] - points[sources]
+    pair_distances = np.hypot(pair_vectors[:, 0], pair_vectors[:, 1])
+    
+    # 排除自身和重合点。单位方向向量的较大分量至少为 √2/2，
+    # 因此"主方向分量 > 0.5"的方向一致性检查对任意非零向量都成立，无需计算
+    valid = pair_distances > 0
+    sources = sources[valid]
+    targets = targets[valid]
+    pair_distances = pair_distances[valid]
+    
+    # 按起点分组为 CSR 邻接表，同一起点的邻居按距离从近到远排列、等距时按索引排列
+    # （搜索时优先沿最近的点延伸；顺序与 KD-Tree 的结构无关，只由点坐标决定）
+    order = np.lexsort((targets, pair_distances, sources))
+    indptr = np.zeros(n_points + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n_points), out=indptr[1:])
+    indices = targets[order].astype(np.int64)
+    
+    # arccos 在 [-1, 1] 上单调递减：夹角 <= 阈值 等价于 夹角余弦 >= 阈值的余弦，
+    # 预先求出阈值的余弦，逐边比较时无需再计算 arccos
+    if angle_threshold >= 180.0:
+        cos_threshold = -math.inf
+    else:
+        cos_threshold = math.cos(math.radians(max(angle_threshold, 0.0)))
     
-    for i in range(n_points):
-        # 搜索半径内的所有点
-        neighbors = tree.query_ball_point(points[i], search_radius)
-        neighbors.remove(i)  # 移除自己
-        
-        for j in neighbors:
-            # 计算方向向量
-            vec_ij = points[j] - points[i]
-            dist_ij = np.linalg.norm(vec_ij)
-            
-            if dist_ij > 0:
-                # 归一化方向向量
-                vec_ij_norm = vec_ij / dist_ij
-                
-                # 检查方向是否主要沿 Y 轴（垂直列）或 X 轴（水平列）
-                # 对于垂直列，主要看 y 分量；对于水平列，主要看 x 分量
-                # 降低阈值，使其更宽松（从 0.7 改为 0.5）
-                if abs(vec_ij_norm[1]) > abs(vec_ij_norm[0]):
-                    # 垂直方向为主
-                    if abs(vec_ij_norm[1]) > 0.5:  # 方向一致性阈值（降低阈值）
-                        edges[i].append(j)
-                else:
-                    # 水平方向为主
-                    if abs(vec_ij_norm[0]) > 0.5:  # 方向一致性阈值（降低阈值）
-                        edges[i].append(j)
-    
-    # 使用深度优先搜索找到所有链
-    visited = set()
-    chains: list[list[int]] = []
-    
-    def dfs_chain(current: int, chain: list[int]) -> None:
-        """深度优先搜索构建链."""
-        visited.add(current)
-        chain.append(current)
-        
-        # 检查角度一致性
-        if len(chain) >= 2:
-            # 计算前两个点的向量
-            vec1 = points[chain[-1]] - points[chain[-2]]
-            vec1_norm = vec1 / (np.linalg.norm(vec1) + 1e-8)
-            
-            # 检查所有可能的下一跳
-            for neighbor in edges[current]:
-                if neighbor not in visited:
-                    # 计算当前点到邻居的向量
-                    vec2 = points[neighbor] - points[current]
-                    vec2_norm = vec2 / (np.linalg.norm(vec2) + 1e-8)
-                    
-                    # 计算夹角（使用点积）
-                    dot_product = np.clip(np.dot(vec1_norm, vec2_norm), -1.0, 1.0)
-                    angle = np.arccos(dot_product) * 180.0 / np.pi
-                    
-                    # 如果角度小于阈值，继续搜索
-                    if angle <= angle_threshold:
-                        dfs_chain(neighbor, chain)
-                        return
-        
-        # 如果没有满足角度要求的下一跳，尝试所有未访问的邻居
-        for neighbor in edges[current]:
-            if neighbor not in visited:
-                dfs_chain(neighbor, chain)
-                return
-    
-    # 从每个未访问的点开始搜索
-    for i in range(n_points):
-        if i not in visited:
-            chain: list[int] = []
-            dfs_chain(i, chain)
-            if len(chain) >= min_chain_length:
-                chains.append(chain)
-    
-    logger.info(f"链式搜索完成：找到 {len(chains)} 条链（最小长度: {min_chain_length}）")
+    # 沿邻接图延伸出所有链（迭代实现，长链不受递归深度限制）
+    xs = np.ascontiguousarray(points[:, 0])
+    ys = np.ascontiguousarray(points[:, 1])
+    if njit is None:
+        xs, ys, indptr, indices = xs.tolist(), ys.tolist(), indptr.tolist(), indices.tolist()
+    chain_order, chain_lengths = _walk_chains(xs, ys, indptr, indices, cos_threshold)
+    
+    # 过滤掉过短的链
+    chains = [
+        chain.tolist()
+        for chain in np.split(chain_order, np.cumsum(chain_lengths)[:-1])
+        if len(chain) >= min_chain_length
+    ]
+    
+    logger.info("链式搜索完成：找到 %d 条链（最小长度: %d）", len(chains), min_chain_length)
     
     return chains
 
@@ -394,46 +668,39 @@ def complete_chains(
     if len(chains) == 0:
         return points, 0
     
-    new_points: list[np.ndarray] = [points.copy()]
-    added_count = 0
+    # 收集所有链中相邻两点构成的线段
+    starts = [index for chain in chains for index in chain[:-1]]
+    ends = [index for chain in chains for index in chain[1:]]
+    if not starts:
+        return points, 0
     
-    for chain in chains:
-        if len(chain) < 2:
-            continue
-        
-        # 按链的顺序处理点
-        chain_points = points[chain]
-        
-        for i in range(len(chain) - 1):
-            p1 = chain_points[i]
-            p2 = chain_points[i + 1]
-            
-            # 计算两点之间的距离
-            dist = np.linalg.norm(p2 - p1)
-            
-            # 计算期望的点数（包括起点和终点）
-            expected_count = int(np.round(dist / median_spacing)) + 1
-            
-            # 如果距离是标准间距的整数倍（在容差范围内），补全缺失的点
-            if expected_count > 2:  # 至少需要补一个点
-                gap_ratio = dist / median_spacing
-                if gap_ratio <= max_gap_ratio:
-                    # 计算需要插入的点数
-                    insert_count = expected_count - 2  # 减去起点和终点
-                    
-                    # 在两点之间插值
-                    for j in range(1, insert_count + 1):
-                        t = j / (insert_count + 1)
-                        new_point = p1 + t * (p2 - p1)
-                        new_points.append(new_point.reshape(1, -1))
-                        added_count += 1
+    p1 = points[starts]
+    p2 = points[ends]
     
-    if added_count > 0:
-        all_points = np.vstack(new_points)
-        logger.info(f"链补全完成：新增 {added_count} 个点")
-        return all_points, added_count
+    # 计算线段长度相对基准间距的比例，以及期望的点数（包括起点和终点）
+    gap_ratios = np.linalg.norm(p2 - p1, axis=1) / median_spacing
+    expected_counts = np.round(gap_ratios).astype(np.int64) + 1
+    
+    # 如果距离是标准间距的整数倍（在容差范围内），补全缺失的点：至少需要补一个点，且间隙不能过大
+    fillable = (expected_counts > 2) & (gap_ratios <= max_gap_ratio)
+    insert_counts = expected_counts[fillable] - 2  # 减去起点和终点
+    added_count = int(insert_counts.sum())
     
-    return points, 0
+    if added_count == 0:
+        return points, 0
+    
+    # 一次性在所有需要补全的线段上等间距插值：第 j 个插入点位于 t = j / (insert_count + 1)
+    segments = np.repeat(np.arange(len(insert_counts)), insert_counts)
+    offsets = np.arange(added_count) - np.repeat(np.cumsum(insert_counts) - insert_counts, insert_counts)
+    t = (offsets + 1) / (insert_counts[segments] + 1)
+    seg_p1 = p1[fillable][segments]
+    seg_p2 = p2[fillable][segments]
+    new_points = seg_p1 + t[:, np.newaxis] * (seg_p2 - seg_p1)
+    
+    all_points = np.vstack([points, new_points])
+    logger.info("链补全完成：新增 %d 个点", added_count)
+    
+    return all_points, added_count
 
 
 def apply_chain_based_correction(
@@ -468,21 +735,29 @@ def apply_chain_based_correction(
         }
     
     original_count = len(detections)
-    logger.info(f"开始链式搜索几何校正，原始检测数: {original_count}")
+    logger.info("开始链式搜索几何校正，原始检测数: %d", original_count)
+    
+    # 单个点既无法计算间距也无法成链，无需构建 KD-Tree
+    if original_count < 2:
+        logger.warning("检测点少于 2 个，无法成链，保持原始检测结果")
+        return detections, {
+            "original_count": original_count,
+            "corrected_count": original_count,
+            "added_count": 0,
+            "removed_count": 0,
+        }
     
     # 提取中心点坐标
-    points = np.array([[det.x_center, det.y_center] for det in detections])
+    points = _extract_centers(detections)
     
-    # 计算基准间距（用于搜索半径和补全）
-    distances = cdist(points, points)
-    distances[distances == 0] = np.inf
-    min_distances = np.min(distances, axis=1)
-    median_spacing = float(np.median(min_distances))
+    # 计算基准间距（用于搜索半径和补全），KD-Tree 供第一次链式搜索复用
+    tree = cKDTree(points)
+    median_spacing = _median_spacing(points, tree)
     
     # 如果未指定搜索半径，使用基准间距的 2.0 倍（增加搜索半径）
     if search_radius is None:
         search_radius = median_spacing * 2.0
-        logger.debug(f"自动计算搜索半径: {search_radius:.1f}px（基准间距: {median_spacing:.1f}px）")
+        logger.debug("自动计算搜索半径: %.1fpx（基准间距: %.1fpx）", search_radius, median_spacing)
     
     # 步骤 1: 找到所有链
     chains = find_chains(
@@ -490,6 +765,7 @@ def apply_chain_based_correction(
         search_radius=search_radius,
         angle_threshold=angle_threshold,
         min_chain_length=min_chain_length,
+        tree=tree,
     )
     
     if len(chains) == 0:
@@ -501,66 +777,41 @@ def apply_chain_based_correction(
             "removed_count": 0,
         }
     
-    # 收集所有在链中的点索引
-    chain_indices = set()
-    for chain in chains:
-        chain_indices.update(chain)
-    
     # 步骤 2: 过滤掉不在任何链中的点（可能是误检）
-    # 使用排序后的索引确保 filtered_points 和 filtered_detections 的顺序一致
-    sorted_indices = sorted(chain_indices)
-    filtered_points = points[sorted_indices]
-    filtered_detections = [detections[i] for i in sorted_indices]
+    # 各链互不相交，排序后的链上索引即为保留的点，filtered_points 和 filtered_detections 顺序一致
+    chain_lengths = [len(chain) for chain in chains]
+    chain_members = np.fromiter(
+        (index for chain in chains for index in chain), dtype=np.int64, count=sum(chain_lengths)
+    )
+    kept_indices = np.sort(chain_members)
+    filtered_points = points[kept_indices]
+    filtered_detections = [detections[i] for i in kept_indices.tolist()]
     removed_count = original_count - len(filtered_points)
     
-    logger.info(f"过滤完成：保留 {len(filtered_points)} 个点，移除 {removed_count} 个孤立点")
+    logger.info("过滤完成：保留 %d 个点，移除 %d 个孤立点", len(filtered_points), removed_count)
     
     # 步骤 3: 补全链中缺失的点
-    # 需要重建链索引（因为过滤后索引改变了）
-    # 为了简化，我们使用过滤后的点重新构建链
-    if len(filtered_points) >= 2:
-        # 重新构建 KD-Tree 和链（使用过滤后的点）
-        filtered_chains = find_chains(
-            filtered_points,
-            search_radius=search_radius,
-            angle_threshold=angle_threshold,
-            min_chain_length=min_chain_length,
-        )
-        
-        completed_points, added_count = complete_chains(
-            filtered_points,
-            filtered_chains,
-            median_spacing=median_spacing,
-            max_gap_ratio=max_gap_ratio,
-        )
-    else:
-        completed_points = filtered_points
-        added_count = 0
-    
-    # 构建校正后的检测结果
-    corrected_detections: list[Detection] = []
-    
-    # 首先添加原始过滤后的检测（保持置信度等信息）
-    for det in filtered_detections:
-        corrected_detections.append(det)
+    # 过滤只删除了不在任何链中的点，直接把已有的链映射到过滤后的索引，无需再次链式搜索
+    remap = np.full(original_count, -1, dtype=np.int64)
+    remap[kept_indices] = np.arange(len(kept_indices))
+    filtered_chains = [
+        chain.tolist()
+        for chain in np.split(remap[chain_members], np.cumsum(chain_lengths)[:-1])
+    ]
+    
+    completed_points, added_count = complete_chains(
+        filtered_points,
+        filtered_chains,
+        median_spacing=median_spacing,
+        max_gap_ratio=max_gap_ratio,
+    )
     
-    # 然后添加补全的点（使用默认值）
+    # 构建校正后的检测结果：首先保留原始过滤后的检测（保持置信度等信息），
+    # 然后添加补全的点（使用默认尺寸和置信度）
+    corrected_detections = filtered_detections
     if added_count > 0:
-        new_point_start_idx = len(filtered_points)
-        for i in range(added_count):
-            point = completed_points[new_point_start_idx + i]
-            x_center, y_center = point[0], point[1]
-            default_width = 50.0
-            default_height = 50.0
-            x = x_center - default_width / 2.0
-            y = y_center - default_height / 2.0
-            
-            corrected_det = Detection(
-                bbox=[x, y, default_width, default_height],
-                confidence=0.5,  # 默认置信度
-                category_id=0,
-            )
-            corrected_detections.append(corrected_det)
+        new_points = completed_points[len(filtered_points):]
+        corrected_detections.extend(DetectionBatch.from_centers(new_points).to_detections())
     
     corrected_count = len(corrected_detections)
     
@@ -572,8 +823,11 @@ def apply_chain_based_correction(
     }
     
     logger.info(
-        f"链式搜索几何校正完成: 原始 {original_count} -> 校正后 {corrected_count} "
-        f"(新增 {added_count}, 删除 {removed_count})"
+        "链式搜索几何校正完成: 原始 %d -> 校正后 %d (新增 %d, 删除 %d)",
+        original_count,
+        corrected_count,
+        added_count,
+        removed_count,
     )
     
     return corrected_detections, stats
@@ -634,22 +888,24 @@ def apply_geometric_correction(
         )
     
     original_count = len(detections)
-    logger.info(f"开始几何校正，原始检测数: {original_count}")
+    logger.info("开始几何校正，原始检测数: %d", original_count)
     
-    # 提取中心点坐标
-    points = np.array([[det.x_center, det.y_center] for det in detections])
+    # 转换为列式存储，提取中心点坐标
+    batch = DetectionBatch.from_detections(detections)
+    points = batch.centers
     
-    corrected_points = points.copy()
+    # 后续步骤都不会原地修改输入（RANSAC 在副本上校正，网格填充返回新数组），无需复制
+    corrected_points = points
+    
+    # 原始点的 KD-Tree：RANSAC 未移动点（未启用或失败）时由网格填充复用
+    points_tree: Optional[cKDTree] = None
     
     # RANSAC 回归校正
     if use_ransac and len(points) >= 3:
         try:
             # 计算基准间距，用于限制校正距离
-            from scipy.spatial.distance import cdist
-            distances = cdist(points, points)
-            distances[distances == 0] = np.inf
-            min_distances = np.min(distances, axis=1)
-            median_spacing = float(np.median(min_distances))
+            points_tree = cKDTree(points)
+            median_spacing = _median_spacing(points, points_tree)
             
             # 最大校正距离设为基准间距的一半（更保守）
             max_correction_distance = max(median_spacing * 0.5, 30.0)
@@ -665,61 +921,40 @@ def apply_geometric_correction(
             if ransac_model is not None:
                 corrected_points = fitted_points
                 logger.info(
-                    f"RANSAC 回归完成（自适应方向，最大校正距离: {max_correction_distance:.1f}px）"
+                    "RANSAC 回归完成（自适应方向，最大校正距离: %.1fpx）",
+                    max_correction_distance,
                 )
         except Exception as e:
-            logger.warning(f"RANSAC 回归失败: {e}，使用原始点")
+            logger.warning("RANSAC 回归失败: %s，使用原始点", e)
     
     # 网格填充
     if use_grid_fill:
         try:
-            filled_points = fill_grid(corrected_points, image_shape, grid_spacing)
+            filled_points = fill_grid(
+                corrected_points,
+                image_shape,
+                grid_spacing,
+                tree=points_tree if corrected_points is points else None,
+            )
             
-            if len(filled_points) > len(corrected_points):
+            # 在替换 corrected_points 之前记录数量，否则新增数恒为 0
+            prev_count = len(corrected_points)
+            filled_count = len(filled_points)
+            if filled_count > prev_count:
                 corrected_points = filled_points
-                logger.info(
-                    f"网格填充完成，新增 {len(filled_points) - len(corrected_points)} 个点"
-                )
+                logger.info("网格填充完成，新增 %d 个点", filled_count - prev_count)
         except Exception as e:
-            logger.warning(f"网格填充失败: {e}，使用校正后的点")
-    
-    # 构建校正后的检测结果
-    corrected_detections: list[Detection] = []
-    
-    # 保留原始检测的置信度和类别信息
-    for i, point in enumerate(corrected_points):
-        if i < len(detections):
-            # 使用原始检测的信息
-            original_det = detections[i]
-            x_center, y_center = point[0], point[1]
-            
-            # 更新中心点，保持原始尺寸
-            x = x_center - original_det.bbox[2] / 2.0
-            y = y_center - original_det.bbox[3] / 2.0
-            
-            corrected_det = Detection(
-                bbox=[x, y, original_det.bbox[2], original_det.bbox[3]],
-                confidence=original_det.confidence,
-                category_id=original_det.category_id,
-                category_name=original_det.category_name,
-                x_center=x_center,
-                y_center=y_center,
-            )
-        else:
-            # 新增的检测点，使用默认值
-            x_center, y_center = point[0], point[1]
-            default_width = 50.0  # 默认宽度
-            default_height = 50.0  # 默认高度
-            x = x_center - default_width / 2.0
-            y = y_center - default_height / 2.0
-            
-            corrected_det = Detection(
-                bbox=[x, y, default_width, default_height],
-                confidence=0.5,  # 默认置信度
-                category_id=0,
-            )
-        
-        corrected_detections.append(corrected_det)
+            logger.warning("网格填充失败: %s，使用校正后的点", e)
+    
+    # 构建校正后的检测结果：新增的点使用默认尺寸和置信度，
+    # 原始检测保留尺寸、置信度和类别信息，只更新中心点
+    kept_count = min(original_count, len(corrected_points))
+    corrected_batch = DetectionBatch.from_centers(corrected_points)
+    corrected_batch.sizes[:kept_count] = batch.sizes[:kept_count]
+    corrected_batch.confidences[:kept_count] = batch.confidences[:kept_count]
+    corrected_batch.category_ids[:kept_count] = batch.category_ids[:kept_count]
+    corrected_batch.category_names[:kept_count] = batch.category_names[:kept_count]
+    corrected_detections = corrected_batch.to_detections()
     
     corrected_count = len(corrected_detections)
     added_count = max(0, corrected_count - original_count)
@@ -733,9 +968,49 @@ def apply_geometric_correction(
     }
     
     logger.info(
-        f"几何校正完成: 原始 {original_count} -> 校正后 {corrected_count} "
-        f"(新增 {added_count}, 删除 {removed_count})"
+        "几何校正完成: 原始 %d -> 校正后 %d (新增 %d, 删除 %d)",
+        original_count,
+        corrected_count,
+        added_count,
+        removed_count,
     )
     
     return corrected_detections, stats
 
+
+def apply_geometric_correction_batch(
+    detections_per_image: list[list[Detection]],
+    image_shapes: list[tuple[int, int]],
+    max_workers: Optional[int] = None,
+    **kwargs: Any,
+) -> list[tuple[list[Detection], dict[str, Any]]]:
+    """
+    对多张图像并行应用几何校正（每张图像在独立进程中处理）.
+    
+    Args:
+        detections_per_image: 每张图像的检测结果列表
+        image_shapes: 每张图像的尺寸 (height, width)，与 detections_per_image 一一对应
+        max_workers: 最大进程数，如果为 None 则使用 config.MAX_WORKERS
+        **kwargs: 传递给 apply_geometric_correction 的校正参数
+        
+    Returns:
+        每张图像的 (校正后的检测结果列表, 统计信息字典)，顺序与输入一致
+        
+    Raises:
+        ValueError: 如果检测结果与图像尺寸的数量不一致
+    """
+    if len(detections_per_image) != len(image_shapes):
+        raise ValueError(
+            f"检测结果数量 ({len(detections_per_image)}) "
+            f"与图像尺寸数量 ({len(image_shapes)}) 不一致"
+        )
+    
+    correct = partial(apply_geometric_correction, **kwargs)
+    
+    # 单张图像时直接在当前进程处理，避免进程启动开销
+    if len(detections_per_image) <= 1:
+        return list(map(correct, detections_per_image, image_shapes))
+    
+    workers = min(max_workers or config.MAX_WORKERS, len(detections_per_image))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(correct, detections_per_image, image_shapes))
@@ -1,17 +1,22 @@
 """推理模块 - Docker 推理客户端和结果解析."""
 
 from src.inference.docker_client import (
+    ContainerStatusMonitor,
     check_container_status,
     get_container_logs,
     run_docker_inference,
+    run_docker_inference_many,
 )
-from src.inference.models import Detection
+from src.inference.models import Detection, DetectionBatch
 from src.inference.result_parser import get_detection_stats, parse_sahi_results
 
 __all__ = [
     "Detection",
+    "DetectionBatch",
+    "ContainerStatusMonitor",
     "check_container_status",
     "run_docker_inference",
+    "run_docker_inference_many",
     "get_container_logs",
     "parse_sahi_results",
     "get_detection_stats",
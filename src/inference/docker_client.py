@@ -1,36 +1,156 @@
 """Docker 推理客户端 - 与 PV Pile Docker 容器交互."""
 
 import logging
+import math
+import os
+import shlex
+import shutil
 import subprocess
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import Any, Optional
 
 import docker
-from docker.errors import ContainerError, DockerException, NotFound
+from docker.errors import APIError, ContainerError, DockerException, NotFound
+from docker.models.containers import Container
 
 import config
+from src.utils.image_info import get_image_shape
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 容器句柄缓存：容器名称 -> 容器对象
+_container_cache: dict[str, Container] = {}
 
-def check_container_status(container_name: Optional[str] = None) -> bool:
+# 容器状态缓存：容器名称 -> (检查时间, 是否正在运行)
+_status_cache: dict[str, tuple[float, bool]] = {}
+
+# 容器内推理脚本的调用命令（参数部分每次调用时追加）
+# 注意：根据 sahi_inference.py 的实际路径调整
+_INFERENCE_SCRIPT_CMD = ("python", "src/inference/sahi_inference.py")
+
+# 容器内终止超时命令的包装命令（超时后发送 SIGKILL），以及进程被 SIGKILL 终止时的退出码
+_EXEC_TIMEOUT_CMD = ("timeout", "-s", "KILL")
+_EXEC_KILLED_EXIT_CODE = 128 + 9
+
+# 容器中找不到要执行的命令时的退出码（推理镜像缺少 timeout 或 python）
+_EXEC_NOT_FOUND_EXIT_CODE = 127
+
+# 超时后额外等待容器内进程被终止、输出流结束的时间（秒）
+_EXEC_KILL_GRACE_SECONDS = 10.0
+
+# 输出流结束后等待 Docker 记录 exec 退出码的最长时间（秒）
+_EXEC_EXIT_CODE_WAIT_SECONDS = 5.0
+
+# 推理命令输出只保留最后若干行，用于失败时的错误信息
+_OUTPUT_TAIL_LINES = 200
+
+# 同时在容器中执行的推理命令数上限（所有调用方共享，避免超出容器的 GPU 显存）
+_exec_slots = threading.BoundedSemaphore(config.INFERENCE_WORKERS)
+
+# 推理结束后等待结果文件出现的最长时间，以及轮询间隔的上限（秒）
+_OUTPUT_WAIT_SECONDS = 10.0
+_OUTPUT_POLL_MAX_INTERVAL = 0.5
+
+
+@lru_cache(maxsize=1)
+def _get_client() -> docker.DockerClient:
+    """
+    获取 Docker 客户端（进程内只创建一次，复用与守护进程的连接）.
+    
+    Returns:
+        Docker 客户端
+    """
+    return docker.from_env()
+
+
+def _get_container(container_name: str, reload: bool = False) -> Container:
+    """
+    获取容器句柄（按名称缓存，避免每次调用都重新 inspect 容器）.
+    
+    首次获取时 containers.get 已经 inspect 过一次；之后只在需要最新状态时 reload。
+    缓存的句柄失效（如容器被删除或以同名重建）时丢弃缓存，按名称重新获取一次。
+    
+    Args:
+        container_name: 容器名称
+        reload: 使用缓存的句柄时是否刷新容器状态
+        
+    Returns:
+        容器对象
+        
+    Raises:
+        NotFound: 如果容器不存在
+        DockerException: 如果 Docker API 调用失败
+    """
+    container = _container_cache.get(container_name)
+    if container is not None:
+        if not reload:
+            return container
+        try:
+            container.reload()
+            return container
+        except APIError:
+            _container_cache.pop(container_name, None)
+    
+    container = _get_client().containers.get(container_name)
+    _container_cache[container_name] = container
+    return container
+
+
+def invalidate_docker_cache() -> None:
+    """清除缓存的 Docker 客户端、容器句柄和容器状态（Docker 守护进程重启后或测试中调用）."""
+    _container_cache.clear()
+    _status_cache.clear()
+    _get_client.cache_clear()
+
+
+def check_container_status(
+    container_name: Optional[str] = None,
+    max_age: float = 0.0,
+) -> bool:
     """
     检查 Docker 容器是否正在运行.
     
+    每次检查的结果都会被记录；指定 max_age 时，如果最近一次检查距今不超过
+    max_age 秒则直接返回该结果，不访问 Docker。
+    
     Args:
         container_name: 容器名称，如果为 None 则使用配置文件中的名称
+        max_age: 可接受的缓存结果的最大时长（秒），为 0 时总是重新检查
         
     Returns:
         如果容器正在运行返回 True，否则返回 False
     """
     container_name = container_name or config.CONTAINER_NAME
     
+    if max_age > 0:
+        cached = _status_cache.get(container_name)
+        if cached is not None and time.monotonic() - cached[0] <= max_age:
+            return cached[1]
+    
+    is_running = _query_container_status(container_name)
+    _status_cache[container_name] = (time.monotonic(), is_running)
+    return is_running
+
+
+def _query_container_status(container_name: str) -> bool:
+    """
+    向 Docker 查询容器是否正在运行（Docker API 不可用时使用命令行）.
+    
+    Args:
+        container_name: 容器名称
+        
+    Returns:
+        如果容器正在运行返回 True，否则返回 False
+    """
     # 首先尝试使用 Docker API
     try:
-        client = docker.from_env()
-        container = client.containers.get(container_name)
+        container = _get_container(container_name, reload=True)
         return container.status == "running"
     except NotFound:
         logger.warning(f"容器 '{container_name}' 未找到（Docker API）")
@@ -41,7 +161,6 @@ def check_container_status(container_name: Optional[str] = None) -> bool:
     
     # 如果 Docker API 失败，尝试使用命令行作为备用方案
     try:
-        import subprocess
         result = subprocess.run(
             ["docker", "ps", "--filter", f"name={container_name}", "--format", "{{.Status}}"],
             capture_output=True,
@@ -60,6 +179,266 @@ def check_container_status(container_name: Optional[str] = None) -> bool:
     return False
 
 
+class ContainerStatusMonitor:
+    """
+    容器状态监视器 - 在后台线程中周期性检查容器状态.
+    
+    读取状态时直接返回最近一次的检查结果，不会阻塞调用方
+    （例如 Streamlit 的页面渲染）。
+    
+    Attributes:
+        container_name: 容器名称
+        interval: 检查间隔（秒）
+    """
+    
+    def __init__(
+        self,
+        container_name: Optional[str] = None,
+        interval: float = config.CONTAINER_STATUS_TTL_SECONDS,
+    ) -> None:
+        """
+        初始化监视器，同步检查一次状态后启动后台线程.
+        
+        Args:
+            container_name: 容器名称，如果为 None 则使用配置文件中的名称
+            interval: 检查间隔（秒）
+        """
+        self.container_name = container_name or config.CONTAINER_NAME
+        self.interval = interval
+        self._is_running = check_container_status(self.container_name)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._poll,
+            name=f"container-status-{self.container_name}",
+            daemon=True,
+        )
+        self._thread.start()
+    
+    @property
+    def is_running(self) -> bool:
+        """最近一次检查时容器是否正在运行."""
+        return self._is_running
+    
+    def refresh(self) -> bool:
+        """
+        立即重新检查容器状态.
+        
+        Returns:
+            如果容器正在运行返回 True，否则返回 False
+        """
+        self._is_running = check_container_status(self.container_name)
+        return self._is_running
+    
+    def stop(self) -> None:
+        """停止后台检查线程."""
+        self._stop_event.set()
+        self._thread.join(timeout=self.interval)
+    
+    def _poll(self) -> None:
+        """后台线程主循环：每隔 interval 秒检查一次状态."""
+        while not self._stop_event.wait(self.interval):
+            self.refresh()
+
+
+def _with_exec_deadline(cmd: list[str], timeout: float) -> list[str]:
+    """
+    用容器内的 timeout 命令包装推理命令，到达超时时间后由容器内部强制终止进程.
+    
+    客户端停止等待并不会结束容器中的进程；包装后超时的推理不会在后台继续占用 GPU。
+    推理镜像中必须有 timeout 命令（Debian/Ubuntu 镜像的 coreutils 或 busybox 均可），
+    否则命令无法启动，退出码为 127。
+    
+    Args:
+        cmd: 要执行的命令
+        timeout: 超时时间（秒）
+        
+    Returns:
+        包装后的命令
+    """
+    return [*_EXEC_TIMEOUT_CMD, str(math.ceil(timeout)), *cmd]
+
+
+def _wait_for_exit_code(api: docker.APIClient, exec_id: str) -> int:
+    """
+    获取 exec 的退出码.
+    
+    输出流结束后，Docker 可能还没有记录退出码（ExitCode 仍为 None），
+    此时按与 _wait_for_file 相同的退避间隔重新查询。
+    
+    Args:
+        api: Docker 底层 API 客户端
+        exec_id: exec 实例 ID
+        
+    Returns:
+        退出码
+        
+    Raises:
+        RuntimeError: 如果在 _EXEC_EXIT_CODE_WAIT_SECONDS 秒内没有取得退出码
+    """
+    deadline = time.monotonic() + _EXEC_EXIT_CODE_WAIT_SECONDS
+    interval = 0.01
+    exit_code = api.exec_inspect(exec_id)["ExitCode"]
+    while exit_code is None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise RuntimeError(f"推理命令已结束，但未能获取退出码（exec {exec_id[:12]}）")
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, _OUTPUT_POLL_MAX_INTERVAL)
+        exit_code = api.exec_inspect(exec_id)["ExitCode"]
+    return exit_code
+
+
+def _exec_with_api(container: Container, cmd: list[str], timeout: float) -> tuple[int, str]:
+    """
+    通过 Docker API 在容器中执行命令，逐块读取输出（不在内存中缓存完整输出）.
+    
+    输出在后台线程中读取并实时写入 DEBUG 日志。命令长时间没有输出时读取会一直阻塞，
+    因此调用线程按截止时间等待读取线程，超时后关闭输出流。Docker API 无法终止已启动的 exec，
+    命令应先经 _with_exec_deadline 包装，由容器内部在超时时终止进程。
+    
+    Args:
+        container: 容器对象
+        cmd: 要执行的命令
+        timeout: 超时时间（秒）
+        
+    Returns:
+        (退出码, 最后 _OUTPUT_TAIL_LINES 行输出)
+        
+    Raises:
+        TimeoutError: 如果命令执行超时
+    """
+    api = container.client.api
+    exec_id = api.exec_create(container.id, cmd, workdir="/app")["Id"]
+    deadline = time.monotonic() + timeout
+    output_tail: deque[str] = deque(maxlen=_OUTPUT_TAIL_LINES)
+    read_errors: list[Exception] = []
+    stream = api.exec_start(exec_id, stream=True, demux=True)
+    
+    def read_output() -> None:
+        """读取输出流，直到命令结束或输出流被关闭."""
+        try:
+            for stdout_chunk, stderr_chunk in stream:
+                for chunk in (stdout_chunk, stderr_chunk):
+                    if chunk:
+                        for line in chunk.decode("utf-8", errors="replace").splitlines():
+                            output_tail.append(line)
+                            logger.debug("推理输出: %s", line)
+        except Exception as e:
+            read_errors.append(e)
+    
+    reader = threading.Thread(target=read_output, name=f"exec-output-{exec_id[:12]}", daemon=True)
+    reader.start()
+    try:
+        # 容器内的 timeout 在截止时间终止进程，输出流随之结束；额外等待一段时间以取得退出码
+        reader.join(timeout + _EXEC_KILL_GRACE_SECONDS)
+        # 必须在关闭输出流之前判断：关闭后读取线程会随即结束
+        timed_out = reader.is_alive()
+    finally:
+        stream.close()
+    
+    if timed_out:
+        raise TimeoutError(f"推理超时（超过 {timeout} 秒）")
+    if read_errors:
+        raise read_errors[0]
+    
+    exit_code = _wait_for_exit_code(api, exec_id)
+    if exit_code == _EXEC_KILLED_EXIT_CODE and time.monotonic() >= deadline:
+        raise TimeoutError(f"推理超时（超过 {timeout} 秒）")
+    return exit_code, "\n".join(output_tail)
+
+
+def _exec_with_cli(docker_cmd: list[str], timeout: float) -> tuple[int, str]:
+    """
+    通过 docker 命令行执行命令，逐行读取输出（不在内存中缓存完整输出）.
+    
+    输出行实时写入 DEBUG 日志，超时后终止 docker 进程。
+    
+    Args:
+        docker_cmd: 完整的 docker exec 命令
+        timeout: 超时时间（秒）
+        
+    Returns:
+        (退出码, 最后 _OUTPUT_TAIL_LINES 行输出)
+        
+    Raises:
+        subprocess.TimeoutExpired: 如果命令执行超时
+    """
+    output_tail: deque[str] = deque(maxlen=_OUTPUT_TAIL_LINES)
+    timed_out = threading.Event()
+    
+    with subprocess.Popen(
+        docker_cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors="replace",
+    ) as process:
+        def kill_on_timeout() -> None:
+            """超时后终止进程（读取输出会阻塞，无法在读取循环中检查超时）."""
+            timed_out.set()
+            process.kill()
+        
+        timer = threading.Timer(timeout, kill_on_timeout)
+        timer.start()
+        try:
+            for line in process.stdout:
+                line = line.rstrip("\n")
+                output_tail.append(line)
+                logger.debug("推理输出: %s", line)
+            exit_code = process.wait()
+        finally:
+            timer.cancel()
+    
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(docker_cmd, timeout, output="\n".join(output_tail))
+    
+    return exit_code, "\n".join(output_tail)
+
+
+def _stage_file(source: Path, target: Path) -> None:
+    """
+    将文件放入容器挂载的目录.
+    
+    与目标目录位于同一文件系统时创建硬链接，不复制文件内容；
+    跨文件系统或文件系统不支持硬链接时退回到复制。
+    
+    Args:
+        source: 源文件路径
+        target: 目标文件路径（已存在时被替换）
+    """
+    target.unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _wait_for_file(path: Path, timeout: float) -> bool:
+    """
+    等待文件出现.
+    
+    文件通常在推理命令结束时就已写好；挂载目录同步有延迟时（如 macOS 的 Docker Desktop），
+    轮询间隔从 10 毫秒开始逐次加倍，直到 _OUTPUT_POLL_MAX_INTERVAL，既能尽快发现文件，
+    又不会在长时间等待中频繁访问文件系统。
+    
+    Args:
+        path: 文件路径
+        timeout: 最长等待时间（秒）
+        
+    Returns:
+        文件在超时前出现返回 True，否则返回 False
+    """
+    deadline = time.monotonic() + timeout
+    interval = 0.01
+    while not path.exists():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, _OUTPUT_POLL_MAX_INTERVAL)
+    return True
+
+
 def run_docker_inference(
     image_path: Path,
     output_dir: Path,
@@ -94,9 +473,11 @@ def run_docker_inference(
         RuntimeError: 如果容器未运行或推理失败
         ValueError: 如果参数无效
     """
-    # 参数验证
-    if not image_path.exists():
-        raise FileNotFoundError(f"输入图像不存在: {image_path}")
+    # 参数验证（只 stat 一次，后续判断是否需要重新放入挂载目录时复用）
+    try:
+        image_stat = image_path.stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"输入图像不存在: {image_path}") from None
     
     if not image_path.suffix.lower() in config.ALLOWED_IMAGE_EXTENSIONS:
         raise ValueError(f"不支持的图像格式: {image_path.suffix}")
@@ -104,8 +485,8 @@ def run_docker_inference(
     container_name = container_name or config.CONTAINER_NAME
     weights_path = weights_path or config.MODEL_WEIGHTS
     
-    # 检查容器状态
-    if not check_container_status(container_name):
+    # 检查容器状态（批量推理时复用短时间内的检查结果，推理失败时清除）
+    if not check_container_status(container_name, max_age=config.CONTAINER_STATUS_TTL_SECONDS):
         raise RuntimeError(
             f"容器 '{container_name}' 未运行。请先启动容器。"
         )
@@ -117,14 +498,16 @@ def run_docker_inference(
     mounted_input_dir = config.get_mounted_input_dir()
     if mounted_input_dir and mounted_input_dir.exists():
         # 如果找到了挂载目录，复制文件到那里
-        mounted_input_dir.mkdir(parents=True, exist_ok=True)
         target_path = mounted_input_dir / image_path.name
         
-        # 如果文件不在挂载目录中，复制它
-        if not target_path.exists() or target_path.stat().st_mtime < image_path.stat().st_mtime:
-            import shutil
-            shutil.copy2(image_path, target_path)
-            logger.info(f"已复制文件到挂载目录: {target_path}")
+        # 如果文件不在挂载目录中（或已过期），放入挂载目录
+        try:
+            needs_staging = target_path.stat().st_mtime < image_stat.st_mtime
+        except FileNotFoundError:
+            needs_staging = True
+        if needs_staging:
+            _stage_file(image_path, target_path)
+            logger.info(f"已将文件放入挂载目录: {target_path}")
         
         # 使用挂载目录中的文件路径
         docker_input_path = str(Path(config.DOCKER_INPUT_DIR) / image_path.name)
@@ -143,11 +526,10 @@ def run_docker_inference(
     docker_json_path = f"{docker_output_dir}/{json_filename}"
     docker_image_path = f"{docker_output_dir}/{image_filename}"
     
-    # 构建推理命令
+    # 构建推理命令（超时包装在确定超时时间后添加）
     # 注意：根据 sahi_inference.py 的实际参数名称调整
     cmd = [
-        "python",
-        "src/inference/sahi_inference.py",  # 可能需要调整路径
+        *_INFERENCE_SCRIPT_CMD,
         "--weights", weights_path,
         "--source", docker_input_path,
         "--output-dir", docker_output_dir,
@@ -161,51 +543,51 @@ def run_docker_inference(
     ]
     
     logger.info(f"开始推理: {image_path.name}")
-    logger.debug(f"Docker 命令: {' '.join(cmd)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Docker 命令: %s", shlex.join(cmd))
     
     # 计算动态超时时间（根据图像大小和切片参数）
+    # 只解析文件头读取尺寸，无需为此解码整张图像
     try:
-        import cv2
-        img = cv2.imread(str(image_path))
-        if img is not None:
-            img_height, img_width = img.shape[:2]
-            # 计算切片数量（考虑重叠）
-            effective_slice_height = slice_height * (1 - overlap_ratio)
-            effective_slice_width = slice_width * (1 - overlap_ratio)
-            num_slices_h = max(1, int((img_height - slice_height) / effective_slice_height) + 1)
-            num_slices_w = max(1, int((img_width - slice_width) / effective_slice_width) + 1)
-            total_slices = num_slices_h * num_slices_w
-            
-            # 估算推理时间：每个切片约 0.1-0.5 秒（取决于硬件）
-            # 保守估计：每个切片 0.3 秒，加上 50% 的缓冲
-            estimated_time = total_slices * 0.3 * 1.5
-            
-            # 超时时间：估算时间的 2 倍，但不超过最大超时时间
-            dynamic_timeout = min(
-                max(int(estimated_time * 2), config.DOCKER_TIMEOUT_SECONDS),
-                config.DOCKER_TIMEOUT_MAX_SECONDS
-            )
-            
-            logger.info(
-                f"图像尺寸: {img_width}x{img_height}, "
-                f"切片数: {total_slices}, "
-                f"估算时间: {estimated_time:.1f}秒, "
-                f"超时设置: {dynamic_timeout}秒"
-            )
-        else:
-            dynamic_timeout = config.DOCKER_TIMEOUT_SECONDS
-            logger.warning(f"无法读取图像尺寸，使用默认超时: {dynamic_timeout}秒")
+        img_height, img_width = get_image_shape(image_path)
+        
+        # 计算切片数量（考虑重叠）
+        effective_slice_height = slice_height * (1 - overlap_ratio)
+        effective_slice_width = slice_width * (1 - overlap_ratio)
+        num_slices_h = max(1, int((img_height - slice_height) / effective_slice_height) + 1)
+        num_slices_w = max(1, int((img_width - slice_width) / effective_slice_width) + 1)
+        total_slices = num_slices_h * num_slices_w
+        
+        # 估算推理时间：每个切片约 0.1-0.5 秒（取决于硬件）
+        # 保守估计：每个切片 0.3 秒，加上 50% 的缓冲
+        estimated_time = total_slices * 0.3 * 1.5
+        
+        # 超时时间：估算时间的 2 倍，但不超过最大超时时间
+        dynamic_timeout = min(
+            max(int(estimated_time * 2), config.DOCKER_TIMEOUT_SECONDS),
+            config.DOCKER_TIMEOUT_MAX_SECONDS
+        )
+        
+        logger.info(
+            f"图像尺寸: {img_width}x{img_height}, "
+            f"切片数: {total_slices}, "
+            f"估算时间: {estimated_time:.1f}秒, "
+            f"超时设置: {dynamic_timeout}秒"
+        )
     except Exception as e:
         dynamic_timeout = config.DOCKER_TIMEOUT_SECONDS
-        logger.warning(f"计算动态超时失败: {e}，使用默认超时: {dynamic_timeout}秒")
+        logger.warning(f"无法读取图像尺寸: {e}，使用默认超时: {dynamic_timeout}秒")
+    
+    # 超时后由容器内部终止推理进程，释放推理名额时不会有残留的进程占用 GPU
+    cmd = _with_exec_deadline(cmd, dynamic_timeout)
     
     start_time = time.time()
     
     # 尝试使用 Docker API，如果失败则使用命令行
+    # 状态检查刚刷新过缓存的容器句柄，这里无需再次 inspect
     use_api = True
     try:
-        client = docker.from_env()
-        container = client.containers.get(container_name)
+        container = _get_container(container_name)
         logger.debug("使用 Docker API 执行推理")
     except Exception as e:
         logger.warning(f"Docker API 不可用: {e}，将使用命令行方式")
@@ -214,33 +596,23 @@ def run_docker_inference(
     try:
         if use_api:
             # 使用 Docker API 执行命令
-            exec_result = container.exec_run(
-                cmd,
-                workdir="/app",
-                timeout=dynamic_timeout,
-            )
-            
-            exit_code = exec_result.exit_code
-            output = exec_result.output.decode("utf-8") if exec_result.output else ""
+            with _exec_slots:
+                exit_code, output = _exec_with_api(container, cmd, dynamic_timeout)
         else:
             # 使用命令行作为备用方案
-            import subprocess
-            import shlex
-            
             # 构建完整的 docker exec 命令
             docker_cmd = ["docker", "exec", "-w", "/app", container_name] + cmd
-            logger.debug(f"执行命令: {' '.join(shlex.quote(str(c)) for c in docker_cmd)}")
-            
-            result = subprocess.run(
-                docker_cmd,
-                capture_output=True,
-                text=True,
-                timeout=dynamic_timeout,
-            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("执行命令: %s", shlex.join(docker_cmd))
             
-            exit_code = result.returncode
-            output = result.stdout + result.stderr
+            with _exec_slots:
+                exit_code, output = _exec_with_cli(docker_cmd, dynamic_timeout)
         
+        if exit_code == _EXEC_NOT_FOUND_EXIT_CODE:
+            raise RuntimeError(
+                f"容器中找不到推理命令 (退出码: {exit_code})。推理镜像需要提供 "
+                f"{_EXEC_TIMEOUT_CMD[0]} 和 {_INFERENCE_SCRIPT_CMD[0]}: {output or '无错误输出'}"
+            )
         if exit_code != 0:
             error_output = output if output else "无错误输出"
             logger.error(f"推理失败，退出码: {exit_code}")
@@ -260,24 +632,14 @@ def run_docker_inference(
             mounted_json_path = mounted_output_dir / json_filename
             mounted_image_path = mounted_output_dir / image_filename
             
-            # 等待文件写入完成（最多等待 10 秒）
-            max_wait = 10
-            wait_interval = 0.5
-            waited = 0
-            
-            while waited < max_wait:
-                if mounted_json_path.exists():
-                    break
-                time.sleep(wait_interval)
-                waited += wait_interval
-            
-            if mounted_json_path.exists():
+            # 等待文件写入完成（最多等待 _OUTPUT_WAIT_SECONDS 秒）
+            if _wait_for_file(mounted_json_path, _OUTPUT_WAIT_SECONDS):
                 # 复制文件到本地输出目录（如果不同）
                 local_json_path = output_dir / json_filename
                 local_image_path = output_dir / image_filename
                 
-                if mounted_output_dir != output_dir:
-                    import shutil
+                # 按文件身份比较（路径写法不同或经过符号链接时仍能识别为同一目录）
+                if not mounted_output_dir.samefile(output_dir):
                     shutil.copy2(mounted_json_path, local_json_path)
                     logger.info(f"已复制 JSON 文件到: {local_json_path}")
                     
@@ -290,7 +652,7 @@ def run_docker_inference(
                             shutil.copy2(mounted_png_path, local_image_path.with_suffix('.png'))
                             local_image_path = local_image_path.with_suffix('.png')
                             logger.info(f"已复制图像文件到: {local_image_path}")
-                        elif mounted_image_path.exists():
+                        else:
                             shutil.copy2(mounted_image_path, local_image_path)
                             logger.info(f"已复制图像文件到: {local_image_path}")
                 else:
@@ -305,18 +667,8 @@ def run_docker_inference(
             local_json_path = output_dir / json_filename
             local_image_path = output_dir / image_filename
             
-            # 等待文件写入完成（最多等待 10 秒）
-            max_wait = 10
-            wait_interval = 0.5
-            waited = 0
-            
-            while waited < max_wait:
-                if local_json_path.exists():
-                    break
-                time.sleep(wait_interval)
-                waited += wait_interval
-            
-            if not local_json_path.exists():
+            # 等待文件写入完成（最多等待 _OUTPUT_WAIT_SECONDS 秒）
+            if not _wait_for_file(local_json_path, _OUTPUT_WAIT_SECONDS):
                 raise FileNotFoundError(
                     f"JSON 结果文件未生成: {local_json_path}"
                 )
@@ -344,16 +696,61 @@ def run_docker_inference(
         return result
         
     except ContainerError as e:
+        _status_cache.pop(container_name, None)
         logger.error(f"容器错误: {e}")
         raise RuntimeError(f"Docker 容器执行错误: {e}") from e
     except DockerException as e:
+        # 句柄可能已失效（如容器被重建），下次调用时重新获取
+        _container_cache.pop(container_name, None)
+        _status_cache.pop(container_name, None)
         logger.error(f"Docker API 错误: {e}")
         raise RuntimeError(f"Docker API 错误: {e}") from e
     except Exception as e:
+        _status_cache.pop(container_name, None)
         logger.error(f"推理过程中发生未知错误: {e}")
         raise RuntimeError(f"推理失败: {e}") from e
 
 
+def run_docker_inference_many(
+    image_paths: list[Path],
+    output_dir: Path,
+    max_workers: Optional[int] = None,
+    **kwargs: Any,
+) -> list[dict[str, Any]]:
+    """
+    对多张图像并发运行推理（线程池，共享同一个 Docker 客户端）.
+    
+    同时执行的推理命令数受 config.INFERENCE_WORKERS 限制，其余线程可以同时
+    准备输入文件和收集输出文件。输入图像的文件名（不含扩展名）应互不相同，
+    否则输出文件会相互覆盖。
+    
+    Args:
+        image_paths: 输入图像路径列表（本地路径）
+        output_dir: 输出目录（本地路径）
+        max_workers: 最大线程数，如果为 None 则使用 config.MAX_WORKERS
+        **kwargs: 传递给 run_docker_inference 的推理参数
+        
+    Returns:
+        每张图像的推理结果字典，顺序与输入一致
+        
+    Raises:
+        FileNotFoundError: 如果输入图像不存在
+        RuntimeError: 如果容器未运行或推理失败
+        ValueError: 如果参数无效
+    """
+    infer = partial(run_docker_inference, output_dir=output_dir, **kwargs)
+    
+    # 单张图像时直接在当前线程处理
+    if len(image_paths) <= 1:
+        return [infer(image_path) for image_path in image_paths]
+    
+    workers = min(max_workers or config.MAX_WORKERS, len(image_paths))
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="docker-inference"
+    ) as executor:
+        return list(executor.map(infer, image_paths))
+
+
 def get_container_logs(
     container_name: Optional[str] = None,
     tail: int = 100,
@@ -371,8 +768,7 @@ def get_container_logs(
     container_name = container_name or config.CONTAINER_NAME
     
     try:
-        client = docker.from_env()
-        container = client.containers.get(container_name)
+        container = _get_container(container_name)
         logs = container.logs(tail=tail).decode("utf-8")
         return logs
     except Exception as e:
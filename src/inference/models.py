@@ -1,14 +1,18 @@
 """数据模型 - 定义检测结果的数据结构."""
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Optional
 
+import numpy as np
 
-@dataclass
+
+@dataclass(slots=True)
 class Detection:
     """
     检测结果数据类.
     
+    使用 __slots__ 存储字段（无实例 __dict__），减少大量检测结果时的内存占用。
+    
     Attributes:
         bbox: 边界框坐标 [x, y, width, height] (COCO 格式)
         confidence: 置信度分数 (0.0-1.0)
@@ -31,6 +35,18 @@ class Detection:
             self.x_center = self.bbox[0] + self.bbox[2] / 2.0
             self.y_center = self.bbox[1] + self.bbox[3] / 2.0
     
+    def __setstate__(self, state: Any) -> None:
+        """
+        反序列化时恢复字段（兼容未使用 __slots__ 时序列化的对象）.
+        
+        Args:
+            state: 使用 __slots__ 后为 (None, 字段字典)，旧版本为实例 __dict__ 字典
+        """
+        if isinstance(state, tuple):
+            state = state[1]
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+    
     def to_dict(self) -> dict:
         """
         转换为字典格式.
@@ -63,4 +79,119 @@ class Detection:
         }
 
 
-
+@dataclass(slots=True)
+class DetectionBatch:
+    """
+    检测结果的列式存储（每个字段一个数组）.
+    
+    几何校正等批量计算直接使用数组，避免逐个访问 Detection 对象；
+    需要对象时通过 to_detections() 一次性构造。
+    
+    Attributes:
+        centers: 中心点坐标，形状为 (n, 2)，每行为 (x_center, y_center)
+        sizes: 尺寸，形状为 (n, 2)，每行为 (width, height)
+        confidences: 置信度，形状为 (n,)
+        category_ids: 类别 ID，形状为 (n,)
+        category_names: 类别名称列表（可选）
+    """
+    
+    centers: np.ndarray
+    sizes: np.ndarray
+    confidences: np.ndarray
+    category_ids: np.ndarray
+    category_names: list[Optional[str]]
+    
+    def __len__(self) -> int:
+        """返回检测数量."""
+        return len(self.centers)
+    
+    @classmethod
+    def from_detections(cls, detections: list[Detection]) -> "DetectionBatch":
+        """
+        从检测结果列表构造.
+        
+        Args:
+            detections: 检测结果列表
+            
+        Returns:
+            列式存储的检测结果
+        """
+        count = len(detections)
+        
+        def column(values: Any, dtype: type = np.float64) -> np.ndarray:
+            return np.fromiter(values, dtype=dtype, count=count)
+        
+        # 逐字段提取（标量生成器的 fromiter 远快于逐行构造元组）
+        centers = np.empty((count, 2), dtype=np.float64)
+        centers[:, 0] = column(det.x_center for det in detections)
+        centers[:, 1] = column(det.y_center for det in detections)
+        sizes = np.empty((count, 2), dtype=np.float64)
+        sizes[:, 0] = column(det.bbox[2] for det in detections)
+        sizes[:, 1] = column(det.bbox[3] for det in detections)
+        
+        return cls(
+            centers=centers,
+            sizes=sizes,
+            confidences=column(det.confidence for det in detections),
+            category_ids=column((det.category_id for det in detections), np.int64),
+            category_names=[det.category_name for det in detections],
+        )
+    
+    @classmethod
+    def from_centers(
+        cls,
+        centers: np.ndarray,
+        width: float = 50.0,
+        height: float = 50.0,
+        confidence: float = 0.5,
+        category_id: int = 0,
+    ) -> "DetectionBatch":
+        """
+        用统一的尺寸、置信度和类别构造（用于几何校正新增的点）.
+        
+        Args:
+            centers: 中心点坐标，形状为 (n, 2)
+            width: 宽度
+            height: 高度
+            confidence: 置信度
+            category_id: 类别 ID
+            
+        Returns:
+            列式存储的检测结果
+        """
+        count = len(centers)
+        sizes = np.empty((count, 2), dtype=np.float64)
+        sizes[:, 0] = width
+        sizes[:, 1] = height
+        
+        return cls(
+            centers=centers,
+            sizes=sizes,
+            confidences=np.full(count, confidence, dtype=np.float64),
+            category_ids=np.full(count, category_id, dtype=np.int64),
+            category_names=[None] * count,
+        )
+    
+    def to_detections(self) -> list[Detection]:
+        """
+        转换为检测结果列表（左上角坐标一次性向量化计算）.
+        
+        Returns:
+            检测结果列表
+        """
+        corners = (self.centers - self.sizes / 2.0).tolist()
+        
+        rows = zip(
+            corners,
+            self.centers.tolist(),
+            self.sizes.tolist(),
+            self.confidences.tolist(),
+            self.category_ids.tolist(),
+            self.category_names,
+        )
+        
+        # 按字段顺序使用位置参数，大量构造时比关键字参数快约一倍
+        return [
+            Detection([x, y, w, h], conf, cat_id, cat_name, xc, yc)
+            for (x, y), (xc, yc), (w, h), conf, cat_id, cat_name in rows
+        ]
@@ -5,6 +5,7 @@ import logging
 from pathlib import Path
 from typing import Any
 
+import config
 from src.inference.models import Detection
 
 # 配置日志
@@ -142,8 +143,6 @@ def get_detection_stats(detections: list[Detection]) -> dict[str, Any]:
             "categories": {},
         }
     
-    import config
-    
     high_conf = sum(
         1 for d in detections if d.confidence >= config.HIGH_CONF_THRESHOLD
     )
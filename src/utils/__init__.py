@@ -1,4 +1,7 @@
 """工具模块 - 文件处理和其他工具函数."""
 
+from src.utils.image_info import get_image_shape
 
-
+__all__ = [
+    "get_image_shape",
+]
@@ -0,0 +1,43 @@
+"""图像信息模块 - 不解码像素读取图像元数据."""
+
+from pathlib import Path
+
+from PIL import Image
+
+# EXIF 方向标签
+_EXIF_ORIENTATION_TAG = 0x0112
+
+
+def get_image_shape(image_path: Path | str) -> tuple[int, int]:
+    """
+    读取图像尺寸（只解析文件头，不解码像素）.
+    
+    与 cv2.imread 保持一致：EXIF 方向为旋转 90° 时交换宽高。
+    
+    Args:
+        image_path: 图像文件路径
+        
+    Returns:
+        图像尺寸 (height, width)
+        
+    Raises:
+        FileNotFoundError: 如果图像文件不存在
+        ValueError: 如果图像格式不支持
+    """
+    image_path = Path(image_path)
+    
+    if not image_path.exists():
+        raise FileNotFoundError(f"图像文件不存在: {image_path}")
+    
+    try:
+        with Image.open(image_path) as image:
+            width, height = image.size
+            orientation = image.getexif().get(_EXIF_ORIENTATION_TAG, 1)
+    except OSError as e:
+        raise ValueError(f"无法读取图像尺寸: {image_path}") from e
+    
+    # EXIF 方向 5-8 表示图像需要旋转 90°/270°
+    if orientation in (5, 6, 7, 8):
+        width, height = height, width
+    
+    return height, width
@@ -11,6 +11,8 @@ from src.visualization.image_stitcher import (
     create_visualization,
     draw_detection_on_image,
     draw_detections_on_image,
+    encode_image,
+    get_image_shape,
     image_to_pil,
     load_image,
     pil_to_image,
@@ -24,7 +26,9 @@ __all__ = [
     "get_confidence_label",
     "get_confidence_emoji",
     "load_image",
+    "get_image_shape",
     "save_image",
+    "encode_image",
     "draw_detection_on_image",
     "draw_detections_on_image",
     "create_visualization",
@@ -9,6 +9,7 @@ import numpy as np
 from PIL import Image
 
 from src.inference.models import Detection
+from src.utils.image_info import get_image_shape
 from src.visualization.confidence_colors import get_confidence_color_bgr
 
 # 配置日志
@@ -188,6 +189,33 @@ def save_image(image: np.ndarray, output_path: Path | str) -> None:
     logger.info(f"成功保存图像: {output_path}")
 
 
+def encode_image(
+    image: np.ndarray,
+    ext: str = ".png",
+    params: Optional[list[int]] = None,
+) -> bytes:
+    """
+    将图像编码为内存中的文件字节（不经过 PIL 转换）.
+    
+    Args:
+        image: 图像数组（BGR 格式）
+        ext: 目标格式扩展名（如 ".png"、".jpg"）
+        params: OpenCV 编码参数（如 [cv2.IMWRITE_PNG_COMPRESSION, 1]）
+        
+    Returns:
+        编码后的图像字节
+        
+    Raises:
+        ValueError: 如果编码失败
+    """
+    success, buffer = cv2.imencode(ext, image, params or [])
+    
+    if not success:
+        raise ValueError(f"图像编码失败: {ext}")
+    
+    return buffer.tobytes()
+
+
 def create_visualization(
     image_path: Path | str,
     detections: list[Detection],
@@ -195,6 +223,7 @@ def create_visualization(
     thickness: int = 2,
     show_label: bool = True,
     show_confidence: bool = True,
+    image: Optional[np.ndarray] = None,
 ) -> np.ndarray:
     """
     创建可视化图像（加载图像、绘制检测框、可选保存）.
@@ -206,12 +235,15 @@ def create_visualization(
         thickness: 线条粗细
         show_label: 是否显示标签
         show_confidence: 是否显示置信度
+        image: 已解码的原图（BGR 格式，可选）。提供时不再从 image_path 加载，
+            且不会被修改，可在多次调用间复用
         
     Returns:
         可视化后的图像（numpy 数组）
     """
-    # 加载图像
-    image = load_image(image_path)
+    # 加载图像（已提供解码结果时跳过）
+    if image is None:
+        image = load_image(image_path)
     
     # 绘制检测框
     vis_image = draw_detections_on_image(
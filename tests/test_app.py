@@ -0,0 +1,95 @@
+"""测试 Streamlit 应用中的缓存与 JSON 导出."""
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+
+import app
+from src.geometry.corrector import CORRECTION_VERSION
+from src.inference.models import Detection
+from src.inference.result_parser import get_detection_stats
+
+if TYPE_CHECKING:
+    from _pytest.capture import CaptureFixture
+    from _pytest.fixtures import FixtureRequest
+    from _pytest.logging import LogCaptureFixture
+    from _pytest.monkeypatch import MonkeyPatch
+    from pytest_mock.plugin import MockerFixture
+
+
+@pytest.fixture(params=["orjson", "json"])
+def json_backend(request: "FixtureRequest", monkeypatch: "MonkeyPatch") -> str:
+    """分别使用 orjson 和标准库 json 序列化."""
+    if request.param == "orjson":
+        if app.orjson is None:
+            pytest.skip("未安装 orjson")
+    else:
+        monkeypatch.setattr(app, "orjson", None)
+    return request.param
+
+
+@pytest.fixture
+def detections() -> list[Detection]:
+    """创建包含多个类别的检测结果."""
+    return [
+        Detection(bbox=[10.0, 20.0, 50.0, 50.0], confidence=0.8, category_id=0),
+        Detection(bbox=[100.0, 150.0, 50.0, 50.0], confidence=0.5, category_id=0),
+        Detection(bbox=[200.0, 250.0, 50.0, 50.0], confidence=0.3, category_id=1, category_name="桩"),
+    ]
+
+
+class TestJsonExport:
+    """测试推理结果和校正结果的 JSON 导出."""
+    
+    def test_inference_json(self, json_backend: str, detections: list[Detection]) -> None:
+        """测试推理结果导出包含以整数类别 ID 为键的统计信息."""
+        detection_dicts = [det.to_dict() for det in detections]
+        
+        data = json.loads(
+            app._build_inference_json(
+                Path("input/image.jpg"), detection_dicts, get_detection_stats(detections)
+            )
+        )
+        
+        assert data["detections"] == detection_dicts
+        assert data["stats"]["categories"] == {"0": 2, "1": 1}
+    
+    def test_correction_json(self, json_backend: str, detections: list[Detection]) -> None:
+        """测试校正结果导出包含原始和校正后的统计信息."""
+        detection_dicts = [det.to_dict() for det in detections]
+        
+        data = json.loads(
+            app._build_correction_json(
+                Path("input/image.jpg"),
+                detection_dicts,
+                detection_dicts[:2],
+                {"original_count": 3, "corrected_count": 2},
+                get_detection_stats(detections[:2]),
+            )
+        )
+        
+        assert data["corrected_detections"] == detection_dicts[:2]
+        assert data["corrected_stats"]["categories"] == {"0": 2}
+        assert data["original_detections"][2]["category_name"] == "桩"
+
+
+class TestCachedCorrection:
+    """测试校正结果缓存."""
+    
+    def test_cache_key_includes_correction_version(
+        self, detections: list[Detection], mocker: "MockerFixture"
+    ) -> None:
+        """测试校正缓存以校正算法版本为键，算法更新后不使用磁盘上的旧结果."""
+        stats = get_detection_stats(detections)
+        mocker.patch.object(app, "_cached_inference", return_value=({}, detections, stats))
+        mock_correction = mocker.patch.object(
+            app, "_cached_correction", return_value=(detections, {}, stats)
+        )
+        
+        app._run_inference_pipeline(
+            "image.jpg", 640, 640, 0.25, 0.2, True, True, True, 2, 10.0, 50.0
+        )
+        
+        assert mock_correction.call_args.args[-1] == CORRECTION_VERSION
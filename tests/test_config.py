@@ -0,0 +1,122 @@
+"""测试配置模块."""
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+from unittest.mock import Mock
+
+import pytest
+
+import config
+
+if TYPE_CHECKING:
+    from _pytest.capture import CaptureFixture
+    from _pytest.fixtures import FixtureRequest
+    from _pytest.logging import LogCaptureFixture
+    from _pytest.monkeypatch import MonkeyPatch
+    from pytest_mock.plugin import MockerFixture
+
+
+_MOUNTS_JSON = (
+    '[{"Type": "bind", "Source": "/host/input", "Destination": "/app/input"}, '
+    '{"Type": "bind", "Source": "/host/output", "Destination": "/app/output"}]\n'
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_mount_cache() -> Iterator[None]:
+    """每个测试前后清除挂载目录缓存."""
+    config.invalidate_mount_cache()
+    yield
+    config.invalidate_mount_cache()
+
+
+class TestMountedDirs:
+    """测试容器挂载目录查询."""
+    
+    def test_inspect_result_is_cached(self, mocker: "MockerFixture") -> None:
+        """测试成功查询后不再重复调用 docker inspect."""
+        mock_run = mocker.patch(
+            "config.subprocess.run",
+            return_value=Mock(returncode=0, stdout=_MOUNTS_JSON),
+        )
+        
+        assert config.get_mounted_input_dir() == Path("/host/input")
+        assert config.get_mounted_input_dir() == Path("/host/input")
+        
+        mock_run.assert_called_once()
+    
+    def test_single_inspect_for_both_dirs(self, mocker: "MockerFixture") -> None:
+        """测试一次 docker inspect 同时获得输入和输出目录."""
+        mock_run = mocker.patch(
+            "config.subprocess.run",
+            return_value=Mock(returncode=0, stdout=_MOUNTS_JSON),
+        )
+        
+        assert config.get_mounted_input_dir() == Path("/host/input")
+        assert config.get_mounted_output_dir() == Path("/host/output")
+        
+        mock_run.assert_called_once()
+    
+    def test_invalidate_mount_cache(self, mocker: "MockerFixture") -> None:
+        """测试清除缓存后重新查询."""
+        mock_run = mocker.patch(
+            "config.subprocess.run",
+            return_value=Mock(returncode=0, stdout=_MOUNTS_JSON),
+        )
+        
+        config.get_mounted_output_dir()
+        config.invalidate_mount_cache()
+        config.get_mounted_output_dir()
+        
+        assert mock_run.call_count == 2
+    
+    def test_failed_inspect_is_not_cached(self, mocker: "MockerFixture") -> None:
+        """测试查询失败时不缓存，容器启动后可以重新查询."""
+        mock_run = mocker.patch(
+            "config.subprocess.run",
+            return_value=Mock(returncode=1, stdout=""),
+        )
+        mocker.patch("config.Path.exists", return_value=False)
+        
+        assert config.get_mounted_input_dir() is None
+        
+        mock_run.return_value = Mock(returncode=0, stdout=_MOUNTS_JSON)
+        
+        assert config.get_mounted_input_dir() == Path("/host/input")
+        assert mock_run.call_count == 2
+
+
+class TestDockerPaths:
+    """测试本地路径到容器路径的转换."""
+    
+    def test_input_direct_child(self) -> None:
+        """测试 INPUT_DIR 下的文件."""
+        path = config.INPUT_DIR / "image.jpg"
+        
+        assert config.get_docker_input_path(path) == "/app/input/image.jpg"
+    
+    def test_input_nested_path(self) -> None:
+        """测试 INPUT_DIR 子目录下的文件保留相对路径."""
+        path = config.INPUT_DIR / "batch" / "image.jpg"
+        
+        assert config.get_docker_input_path(path) == "/app/input/batch/image.jpg"
+    
+    def test_input_outside_dir_uses_name(self, tmp_path: Path) -> None:
+        """测试不在 INPUT_DIR 下的文件只使用文件名."""
+        assert config.get_docker_input_path(tmp_path / "image.jpg") == "/app/input/image.jpg"
+    
+    def test_output_paths(self) -> None:
+        """测试输出路径转换."""
+        assert (
+            config.get_docker_output_path(config.OUTPUT_DIR / "result.json")
+            == "/app/output/result.json"
+        )
+        assert (
+            config.get_docker_output_path(config.OUTPUT_DIR / "run" / "result.json")
+            == "/app/output/run/result.json"
+        )
+    
+    def test_output_outside_dir_raises(self, tmp_path: Path) -> None:
+        """测试不在 OUTPUT_DIR 下的输出路径抛出异常."""
+        with pytest.raises(ValueError):
+            config.get_docker_output_path(tmp_path / "result.json")
@@ -4,11 +4,23 @@ from typing import TYPE_CHECKING
 
 import numpy as np
 import pytest
+from scipy.spatial import cKDTree
+from scipy.spatial.distance import cdist
+from sklearn.linear_model import RANSACRegressor
 
+from src.geometry import corrector
 from src.geometry.corrector import (
+    _median_spacing,
+    _score_quadratic_trials_loop,
+    _score_quadratic_trials_numpy,
+    apply_chain_based_correction,
     apply_geometric_correction,
+    apply_geometric_correction_batch,
+    complete_chains,
+    detect_main_direction,
     detections_to_sgf_format,
     fill_grid,
+    find_chains,
     fit_grid_with_ransac,
     sgf_format_to_detections,
 )
@@ -32,6 +44,55 @@ def sample_detections() -> list[Detection]:
     ]
 
 
+def _find_chains_reference(
+    points: np.ndarray,
+    search_radius: float,
+    angle_threshold: float = 15.0,
+    min_chain_length: int = 3,
+) -> list[list[int]]:
+    """原始的链式搜索实现（逐点查询邻居并检查方向，逐点延伸），邻居改为从近到远排列，作为对照."""
+    tree = cKDTree(points)
+    edges: list[list[int]] = []
+    for i in range(len(points)):
+        neighbors = []
+        for j in tree.query_ball_point(points[i], search_radius):
+            vec = points[j] - points[i]
+            dist = np.linalg.norm(vec)
+            if j != i and dist > 0 and np.abs(vec / dist).max() > 0.5:
+                neighbors.append((dist, j))
+        edges.append([j for _, j in sorted(neighbors)])
+    
+    visited: set[int] = set()
+    chains: list[list[int]] = []
+    for start in range(len(points)):
+        if start in visited:
+            continue
+        chain = [start]
+        visited.add(start)
+        while True:
+            current = chain[-1]
+            unvisited = [j for j in edges[current] if j not in visited]
+            next_point = unvisited[0] if unvisited else None
+            if len(chain) >= 2:
+                vec1 = points[current] - points[chain[-2]]
+                vec1 = vec1 / (np.linalg.norm(vec1) + 1e-8)
+                for j in unvisited:
+                    vec2 = points[j] - points[current]
+                    vec2 = vec2 / (np.linalg.norm(vec2) + 1e-8)
+                    angle = np.degrees(np.arccos(np.clip(np.dot(vec1, vec2), -1.0, 1.0)))
+                    if angle <= angle_threshold:
+                        next_point = j
+                        break
+            if next_point is None:
+                break
+            chain.append(next_point)
+            visited.add(next_point)
+        if len(chain) >= min_chain_length:
+            chains.append(chain)
+    
+    return chains
+
+
 class TestDetectionsToSgfFormat:
     """测试检测结果转换为 SolarGeoFix 格式."""
     
@@ -92,6 +153,47 @@ class TestSgfFormatToDetections:
         assert first_det.confidence == 0.8
 
 
+class TestMedianSpacing:
+    """测试基准间距计算."""
+    
+    def test_matches_full_distance_matrix(self) -> None:
+        """测试与完整距离矩阵（忽略重合点）的结果一致."""
+        rng = np.random.default_rng(0)
+        points = rng.uniform(0, 1000, (200, 2))
+        points[:20] = points[20:40]  # 重合点
+        
+        distances = cdist(points, points)
+        distances[distances == 0] = np.inf
+        expected = float(np.median(np.min(distances, axis=1)))
+        
+        assert _median_spacing(points) == pytest.approx(expected)
+    
+    def test_all_points_coincide(self) -> None:
+        """测试所有点重合时间距为无穷大."""
+        points = np.full((5, 2), 10.0)
+        
+        assert _median_spacing(points) == np.inf
+
+
+class TestDetectMainDirection:
+    """测试主要方向检测."""
+    
+    def test_horizontal_and_vertical(self) -> None:
+        """测试沿 X 轴和沿 Y 轴分布的点."""
+        x = np.linspace(0, 1000, 20)
+        y = 300 + np.sin(x) * 5
+        
+        assert detect_main_direction(np.column_stack([x, y])) == "horizontal"
+        assert detect_main_direction(np.column_stack([y, x])) == "vertical"
+    
+    def test_mixed_direction(self) -> None:
+        """测试各向均匀分布和完全重合的点."""
+        xs, ys = np.meshgrid(np.arange(10.0), np.arange(10.0))
+        
+        assert detect_main_direction(np.column_stack([xs.ravel(), ys.ravel()])) == "mixed"
+        assert detect_main_direction(np.full((5, 2), 10.0)) == "mixed"
+
+
 class TestFitGridWithRansac:
     """测试 RANSAC 网格拟合."""
     
@@ -108,6 +210,69 @@ class TestFitGridWithRansac:
         assert fitted_points.shape == points.shape
         assert len(fitted_points) == len(points)
     
+    def test_quadratic_fit_ignores_outliers(self) -> None:
+        """测试二次拟合能从含离群点的数据中恢复曲线."""
+        rng = np.random.default_rng(0)
+        x = np.linspace(0, 1000, 60)
+        y = 200 + 0.05 * x + 1e-4 * x**2 + rng.normal(0, 1, 60)
+        y[::10] += 300  # 离群点
+        points = np.column_stack([x, y])
+        
+        model, fitted_points = fit_grid_with_ransac(
+            points, degree=2, use_adaptive_direction=False
+        )
+        
+        np.testing.assert_allclose(model, [200, 0.05, 1e-4], rtol=0.05, atol=1.0)
+        # 离群点超出最大校正距离，保持原位；其他点只在 y 方向移动
+        np.testing.assert_array_equal(fitted_points[::10], points[::10])
+        np.testing.assert_array_equal(fitted_points[:, 0], x)
+    
+    @pytest.mark.parametrize(("noise", "max_deviation"), [(1.0, 1e-6), (4.0, 2.0)])
+    def test_quadratic_fit_close_to_sklearn(self, noise: float, max_deviation: float) -> None:
+        """测试二次拟合与 sklearn 的 RANSACRegressor 的偏差有界.
+        
+        两者的抽样方式不同，内点与离群点界限分明时得到相同的一致集，结果一致；
+        噪声接近残差阈值时一致集可能相差几个点，拟合曲线只有小幅偏差。
+        """
+        rng = np.random.default_rng(0)
+        x = np.linspace(0, 1000, 80)
+        y = 200 + 0.05 * x + 1e-4 * x**2 + rng.normal(0, noise, 80)
+        y[::8] += 100  # 离群点
+        x_poly = np.vander(x, N=3, increasing=True)
+        
+        model, _ = fit_grid_with_ransac(
+            np.column_stack([x, y]), degree=2, use_adaptive_direction=False
+        )
+        reference = RANSACRegressor(residual_threshold=10.0, max_trials=100, random_state=42)
+        reference.fit(x_poly, y)
+        
+        deviation = np.abs(x_poly @ model - reference.predict(x_poly))
+        assert deviation.max() <= max_deviation
+    
+    def test_quadratic_fit_degenerate_points(self) -> None:
+        """测试自变量全部相同时二次拟合抛出异常."""
+        points = np.column_stack([np.full(5, 10.0), np.arange(5.0)])
+        
+        with pytest.raises(ValueError, match="退化"):
+            fit_grid_with_ransac(points, degree=2, use_adaptive_direction=False)
+    
+    def test_trial_scoring_loop_matches_numpy(self) -> None:
+        """测试供 numba 编译的逐点循环与 NumPy 向量化实现结果一致."""
+        rng = np.random.default_rng(1)
+        x = rng.uniform(0, 1000, 200)
+        y = 100 + 0.1 * x + rng.normal(0, 5, 200)
+        coefs = np.stack([
+            rng.normal(100, 5, 30),
+            rng.normal(0.1, 0.01, 30),
+            rng.normal(0, 1e-5, 30),
+        ])
+        
+        loop_counts, loop_errors = _score_quadratic_trials_loop(x, y, coefs, 10.0)
+        numpy_counts, numpy_errors = _score_quadratic_trials_numpy(x, y, coefs, 10.0)
+        
+        np.testing.assert_array_equal(loop_counts, numpy_counts)
+        np.testing.assert_allclose(loop_errors, numpy_errors)
+    
     def test_fit_with_insufficient_points(self) -> None:
         """测试点数不足时的拟合."""
         points = np.array([[10.0, 20.0], [30.0, 40.0]])  # 只有 2 个点
@@ -144,6 +309,32 @@ class TestFillGrid:
             for p in filled_points
         )
     
+    def test_fill_grid_mixed_density(self) -> None:
+        """测试局部密集的检测区域不影响稀疏区域的填充."""
+        # 间距 10 的密集点阵（点数多于整个边界框内的网格点数）加上间距 120 的稀疏点阵
+        xs, ys = np.meshgrid(np.arange(100.0, 500.0, 10.0), np.arange(100.0, 500.0, 10.0))
+        dense = np.column_stack([xs.ravel(), ys.ravel()])
+        xs, ys = np.meshgrid(np.arange(100.0, 1900.0, 120.0), np.arange(700.0, 1900.0, 120.0))
+        sparse = np.column_stack([xs.ravel(), ys.ravel()])
+        points = np.vstack([dense, sparse])
+        
+        filled_points = fill_grid(points, (2000, 2000), grid_spacing=50.0)
+        
+        assert len(filled_points) == len(points) + 288
+        np.testing.assert_array_equal(filled_points[: len(points)], points)
+    
+    def test_fill_grid_reuses_tree(self, mocker: "MockerFixture") -> None:
+        """测试提供 KD-Tree 时结果不变且不再重新构建."""
+        points = np.array([[50.0, 50.0], [150.0, 150.0], [250.0, 250.0]])
+        expected = fill_grid(points, (500, 500), grid_spacing=100.0)
+        tree = cKDTree(points)
+        spy = mocker.spy(corrector, "cKDTree")
+        
+        filled_points = fill_grid(points, (500, 500), grid_spacing=100.0, tree=tree)
+        
+        np.testing.assert_array_equal(filled_points, expected)
+        assert spy.call_count == 0
+    
     def test_fill_grid_without_points(self) -> None:
         """测试没有现有点时的网格填充（应该返回空数组）."""
         points = np.array([]).reshape(0, 2)
@@ -169,6 +360,119 @@ class TestFillGrid:
         )
 
 
+class TestFindChains:
+    """测试链式搜索."""
+    
+    @pytest.mark.parametrize("search_radius", [60.0, 100.0])
+    def test_matches_per_point_ball_query(self, search_radius: float) -> None:
+        """测试与逐点 query_ball_point 构建邻接的原始实现（邻居从近到远排列）结果一致."""
+        rng = np.random.default_rng(3)
+        xs, ys = np.meshgrid(np.arange(15) * 40.0, np.arange(15) * 40.0)
+        points = np.column_stack([xs.ravel(), ys.ravel()]) + rng.normal(0, 3, (225, 2))
+        points = points[rng.random(225) > 0.15]
+        points = np.vstack([points, rng.uniform(0, 600, (10, 2))])
+        
+        chains = find_chains(points, search_radius=search_radius)
+        
+        assert chains == _find_chains_reference(points, search_radius)
+    
+    def test_evenly_spaced_column_forms_single_chain(self) -> None:
+        """测试等间距的一列点沿最近邻连成一条完整的链."""
+        points = np.column_stack([np.full(20, 300.0), np.arange(20) * 40.0])
+        
+        chains = find_chains(points, search_radius=80.0)
+        
+        assert len(chains) == 1
+        assert sorted(chains[0]) == list(range(20))
+        # 链按空间顺序排列，相邻点间距等于点阵间距
+        steps = np.linalg.norm(np.diff(points[chains[0]], axis=0), axis=1)
+        np.testing.assert_allclose(steps, 40.0)
+    
+    def test_chains_independent_of_tree_structure(self) -> None:
+        """测试链只由点坐标决定，与 KD-Tree 的结构（叶节点大小）无关."""
+        rng = np.random.default_rng(5)
+        xs, ys = np.meshgrid(np.arange(12) * 40.0, np.arange(12) * 40.0)
+        points = np.column_stack([xs.ravel(), ys.ravel()]) + rng.normal(0, 3, (144, 2))
+        
+        chains = find_chains(points, search_radius=60.0)
+        
+        for leafsize in (1, 4, 64):
+            tree = cKDTree(points, leafsize=leafsize)
+            assert find_chains(points, search_radius=60.0, tree=tree) == chains
+    
+    def test_long_chain_has_no_recursion_limit(self) -> None:
+        """测试超过 Python 递归深度的长链也能完整搜索."""
+        points = np.column_stack([np.zeros(3000), np.arange(3000) * 10.0])
+        
+        chains = find_chains(points, search_radius=15.0)
+        
+        assert len(chains) == 1
+        assert len(chains[0]) == 3000
+    
+    def test_isolated_points_are_not_chained(self) -> None:
+        """测试相互距离超过搜索半径的点不形成链."""
+        points = np.array([[0.0, 0.0], [500.0, 0.0], [0.0, 500.0], [500.0, 500.0]])
+        
+        assert find_chains(points, search_radius=100.0) == []
+
+
+class TestCompleteChains:
+    """测试链补全."""
+    
+    def test_fill_gaps_by_spacing(self) -> None:
+        """测试按基准间距在间隙中等间距插入缺失的点."""
+        # 间距 50：0 -> 50 正常，50 -> 150、150 -> 250 各缺 1 个点
+        points = np.array([[0.0, 0.0], [0.0, 50.0], [0.0, 150.0], [0.0, 250.0]])
+        
+        completed, added_count = complete_chains(points, [[0, 1, 2, 3]], median_spacing=50.0)
+        
+        assert added_count == 2
+        np.testing.assert_array_equal(completed[:4], points)
+        np.testing.assert_allclose(completed[4:], [[0.0, 100.0], [0.0, 200.0]])
+    
+    def test_gap_too_large_is_not_filled(self) -> None:
+        """测试超过最大间隙比例的间隙不补全."""
+        points = np.array([[0.0, 0.0], [0.0, 50.0], [0.0, 300.0]])
+        
+        completed, added_count = complete_chains(
+            points, [[0, 1, 2]], median_spacing=50.0, max_gap_ratio=2.5
+        )
+        
+        assert added_count == 0
+        assert completed is points
+
+
+class TestApplyChainBasedCorrection:
+    """测试链式搜索校正."""
+    
+    def test_filter_and_complete_with_single_search(self, mocker: "MockerFixture") -> None:
+        """测试移除孤立点并补全链中间隙，保留的检测结果与点坐标顺序一致，且只进行一次链式搜索."""
+        centers = [(0.0, 100.0), (50.0, 100.0), (100.0, 100.0), (150.0, 100.0), (250.0, 100.0)]
+        detections = [
+            Detection(bbox=[x - 25.0, y - 25.0, 50.0, 50.0], confidence=0.9, category_id=0)
+            for x, y in [(1000.0, 1000.0)] + centers
+        ]
+        spy = mocker.spy(corrector, "find_chains")
+        
+        corrected, stats = apply_chain_based_correction(detections, image_shape=(2000, 2000))
+        
+        assert spy.call_count == 1
+        assert stats["removed_count"] == 1
+        assert stats["added_count"] == 1
+        assert corrected[:5] == detections[1:]
+        assert (corrected[5].x_center, corrected[5].y_center) == pytest.approx((200.0, 100.0))
+    
+    def test_single_detection_is_kept(self) -> None:
+        """测试单个检测点时保持原始结果."""
+        detections = [Detection(bbox=[0.0, 0.0, 50.0, 50.0], confidence=0.9, category_id=0)]
+        
+        corrected, stats = apply_chain_based_correction(detections, image_shape=(100, 100))
+        
+        assert corrected == detections
+        assert stats["removed_count"] == 0
+        assert stats["added_count"] == 0
+
+
 class TestApplyGeometricCorrection:
     """测试几何校正."""
     
@@ -224,6 +528,21 @@ class TestApplyGeometricCorrection:
         assert abs(len(corrected) - len(sample_detections)) <= 2
         assert stats["original_count"] == len(sample_detections)
     
+    def test_grid_fill_log_reports_added_count(
+        self, sample_detections: list[Detection], caplog: "LogCaptureFixture"
+    ) -> None:
+        """测试网格填充日志中的新增数量与统计一致."""
+        with caplog.at_level("INFO", logger="src.geometry.corrector"):
+            _, stats = apply_geometric_correction(
+                detections=sample_detections,
+                image_shape=(1000, 1000),
+                use_ransac=False,
+                use_grid_fill=True,
+            )
+        
+        assert stats["added_count"] > 0
+        assert f"网格填充完成，新增 {stats['added_count']} 个点" in caplog.messages
+    
     def test_correction_with_empty_detections(self) -> None:
         """测试空检测结果时的几何校正."""
         image_shape = (1000, 1000)
@@ -262,3 +581,35 @@ class TestApplyGeometricCorrection:
             assert corr.bbox[2] == orig.bbox[2]  # width
             assert corr.bbox[3] == orig.bbox[3]  # height
 
+
+class TestApplyGeometricCorrectionBatch:
+    """测试批量几何校正."""
+    
+    def test_batch_matches_sequential(
+        self, sample_detections: list[Detection]
+    ) -> None:
+        """测试批量结果与逐张校正一致且保持顺序."""
+        detections_per_image = [sample_detections, sample_detections[:2], []]
+        image_shapes = [(1000, 1000), (500, 800), (1000, 1000)]
+        
+        results = apply_geometric_correction_batch(
+            detections_per_image,
+            image_shapes,
+            max_workers=2,
+            use_ransac=False,
+        )
+        
+        assert len(results) == len(detections_per_image)
+        for (corrected, stats), detections, shape in zip(
+            results, detections_per_image, image_shapes
+        ):
+            expected, expected_stats = apply_geometric_correction(
+                detections, shape, use_ransac=False
+            )
+            assert corrected == expected
+            assert stats == expected_stats
+    
+    def test_batch_length_mismatch(self, sample_detections: list[Detection]) -> None:
+        """测试检测结果与图像尺寸数量不一致时抛出异常."""
+        with pytest.raises(ValueError, match="不一致"):
+            apply_geometric_correction_batch([sample_detections], [])
@@ -1,16 +1,29 @@
 """测试 Docker 客户端."""
 
+import subprocess
+import sys
+import threading
+import time
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterator
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 from docker.errors import ContainerError, DockerException, NotFound
 
+import config
+from src.inference import docker_client
 from src.inference.docker_client import (
+    ContainerStatusMonitor,
+    _exec_with_api,
+    _exec_with_cli,
+    _stage_file,
+    _wait_for_file,
     check_container_status,
     get_container_logs,
+    invalidate_docker_cache,
     run_docker_inference,
+    run_docker_inference_many,
 )
 
 if TYPE_CHECKING:
@@ -21,6 +34,21 @@ if TYPE_CHECKING:
     from pytest_mock.plugin import MockerFixture
 
 
+def make_exec_stream(chunks: list[tuple[bytes | None, bytes | None]]) -> MagicMock:
+    """创建模拟的 exec 输出流（可迭代，且可关闭）."""
+    stream = MagicMock()
+    stream.__iter__.return_value = iter(chunks)
+    return stream
+
+
+@pytest.fixture(autouse=True)
+def clear_docker_cache() -> Iterator[None]:
+    """每个测试前后清除 Docker 客户端和容器句柄缓存."""
+    invalidate_docker_cache()
+    yield
+    invalidate_docker_cache()
+
+
 class TestCheckContainerStatus:
     """测试容器状态检查."""
     
@@ -61,6 +89,111 @@ class TestCheckContainerStatus:
         
         assert result is False
 
+    
+    def test_client_and_container_are_cached(self, mocker: "MockerFixture") -> None:
+        """测试重复检查时复用客户端和容器句柄，只刷新状态."""
+        mock_container = Mock()
+        mock_container.status = "running"
+        
+        mock_client = Mock()
+        mock_client.containers.get.return_value = mock_container
+        
+        mock_from_env = mocker.patch(
+            "src.inference.docker_client.docker.from_env", return_value=mock_client
+        )
+        
+        assert check_container_status("test_container") is True
+        assert check_container_status("test_container") is True
+        
+        mock_from_env.assert_called_once()
+        mock_client.containers.get.assert_called_once_with("test_container")
+        mock_container.reload.assert_called_once()
+    
+    def test_stale_container_is_refetched(self, mocker: "MockerFixture") -> None:
+        """测试缓存的容器句柄失效时按名称重新获取."""
+        stale_container = Mock()
+        stale_container.reload.side_effect = NotFound("Container not found")
+        
+        new_container = Mock()
+        new_container.status = "running"
+        
+        mock_client = Mock()
+        mock_client.containers.get.side_effect = [stale_container, new_container]
+        
+        mocker.patch("src.inference.docker_client.docker.from_env", return_value=mock_client)
+        
+        check_container_status("test_container")
+        
+        assert check_container_status("test_container") is True
+        assert mock_client.containers.get.call_count == 2
+    
+    def test_recent_status_is_reused(self, mocker: "MockerFixture") -> None:
+        """测试指定 max_age 时复用最近一次的检查结果."""
+        mock_query = mocker.patch(
+            "src.inference.docker_client._query_container_status",
+            return_value=True,
+        )
+        
+        assert check_container_status("test_container") is True
+        assert check_container_status("test_container", max_age=60.0) is True
+        assert mock_query.call_count == 1
+        
+        assert check_container_status("test_container") is True
+        assert mock_query.call_count == 2
+
+class TestContainerStatusMonitor:
+    """测试后台容器状态监视器."""
+    
+    def test_initial_status(self, mocker: "MockerFixture") -> None:
+        """测试创建时同步检查一次状态."""
+        mock_check = mocker.patch(
+            "src.inference.docker_client.check_container_status",
+            return_value=True,
+        )
+        
+        monitor = ContainerStatusMonitor("test_container", interval=60.0)
+        try:
+            assert monitor.is_running is True
+            mock_check.assert_called_once_with("test_container")
+        finally:
+            monitor.stop()
+    
+    def test_background_refresh(self, mocker: "MockerFixture") -> None:
+        """测试后台线程会刷新状态."""
+        mock_check = mocker.patch(
+            "src.inference.docker_client.check_container_status",
+            return_value=False,
+        )
+        
+        monitor = ContainerStatusMonitor("test_container", interval=0.01)
+        try:
+            assert monitor.is_running is False
+            mock_check.return_value = True
+            
+            deadline = time.monotonic() + 2.0
+            while not monitor.is_running and time.monotonic() < deadline:
+                time.sleep(0.01)
+            
+            assert monitor.is_running is True
+        finally:
+            monitor.stop()
+    
+    def test_refresh(self, mocker: "MockerFixture") -> None:
+        """测试手动刷新立即更新状态."""
+        mock_check = mocker.patch(
+            "src.inference.docker_client.check_container_status",
+            return_value=False,
+        )
+        
+        monitor = ContainerStatusMonitor("test_container", interval=60.0)
+        try:
+            mock_check.return_value = True
+            
+            assert monitor.refresh() is True
+            assert monitor.is_running is True
+        finally:
+            monitor.stop()
+
 
 class TestRunDockerInference:
     """测试 Docker 推理功能."""
@@ -136,12 +269,10 @@ class TestRunDockerInference:
         image_path.write_bytes(b"fake prediction image")
         
         # 模拟 Docker 容器
-        mock_exec_result = Mock()
-        mock_exec_result.exit_code = 0
-        mock_exec_result.output = b""
-        
         mock_container = Mock()
-        mock_container.exec_run.return_value = mock_exec_result
+        mock_container.client.api.exec_create.return_value = {"Id": "exec-id"}
+        mock_container.client.api.exec_start.return_value = make_exec_stream([(b"done\n", None)])
+        mock_container.client.api.exec_inspect.return_value = {"ExitCode": 0}
         
         mock_client = Mock()
         mock_client.containers.get.return_value = mock_container
@@ -169,23 +300,326 @@ class TestRunDockerInference:
     ) -> None:
         """测试推理失败的情况."""
         # 模拟 Docker 容器执行失败
-        mock_exec_result = Mock()
-        mock_exec_result.exit_code = 1
-        mock_exec_result.output = b"Error: Model not found"
-        
         mock_container = Mock()
-        mock_container.exec_run.return_value = mock_exec_result
+        mock_container.client.api.exec_create.return_value = {"Id": "exec-id"}
+        mock_container.client.api.exec_start.return_value = make_exec_stream(
+            [(None, b"Error: Model not found\n")]
+        )
+        mock_container.client.api.exec_inspect.return_value = {"ExitCode": 1}
         
         mock_client = Mock()
         mock_client.containers.get.return_value = mock_container
         mock_docker.return_value = mock_client
         
-        with pytest.raises(RuntimeError, match="Docker 推理失败"):
+        with pytest.raises(RuntimeError, match="Docker 推理失败.*Model not found"):
             run_docker_inference(
                 image_path=mock_image_path,
                 output_dir=mock_output_dir,
             )
 
+    
+    def test_timeout_from_image_header(
+        self, mock_image_path: Path, mock_output_dir: Path, mocker: "MockerFixture"
+    ) -> None:
+        """测试根据文件头中的图像尺寸计算超时，不解码图像."""
+        mocker.patch("src.inference.docker_client.check_container_status", return_value=True)
+        mocker.patch("src.inference.docker_client.docker.from_env")
+        mocker.patch(
+            "src.inference.docker_client.get_image_shape", return_value=(40000, 40000)
+        )
+        mock_imread = mocker.patch("cv2.imread")
+        mock_exec = mocker.patch(
+            "src.inference.docker_client._exec_with_api", return_value=(0, "")
+        )
+        (mock_output_dir / "test_image.json").write_text('{"annotations": []}')
+        
+        run_docker_inference(image_path=mock_image_path, output_dir=mock_output_dir)
+        
+        assert mock_exec.call_args.args[2] == config.DOCKER_TIMEOUT_MAX_SECONDS
+        assert mock_exec.call_args.args[1][:4] == [
+            "timeout", "-s", "KILL", str(config.DOCKER_TIMEOUT_MAX_SECONDS)
+        ]
+        mock_imread.assert_not_called()
+    
+    def test_input_staged_only_when_outdated(
+        self,
+        mock_image_path: Path,
+        mock_output_dir: Path,
+        tmp_path: Path,
+        mocker: "MockerFixture",
+    ) -> None:
+        """测试输入图像只在挂载目录中缺失或过期时才重新放入."""
+        mounted_input_dir = tmp_path / "mounted_input"
+        mounted_input_dir.mkdir()
+        mocker.patch("config.get_mounted_input_dir", return_value=mounted_input_dir)
+        mocker.patch("src.inference.docker_client.check_container_status", return_value=True)
+        mocker.patch("src.inference.docker_client.docker.from_env")
+        mocker.patch("src.inference.docker_client._exec_with_api", return_value=(0, ""))
+        spy = mocker.spy(docker_client, "_stage_file")
+        (mock_output_dir / "test_image.json").write_text('{"annotations": []}')
+        
+        run_docker_inference(image_path=mock_image_path, output_dir=mock_output_dir)
+        run_docker_inference(image_path=mock_image_path, output_dir=mock_output_dir)
+        
+        assert spy.call_count == 1
+        assert (mounted_input_dir / "test_image.jpg").read_bytes() == b"fake image data"
+    
+    def test_symlinked_output_dir_is_not_copied(
+        self,
+        mock_image_path: Path,
+        mock_output_dir: Path,
+        tmp_path: Path,
+        mocker: "MockerFixture",
+    ) -> None:
+        """测试输出目录是挂载目录的符号链接时直接使用挂载目录中的文件."""
+        linked_output_dir = tmp_path / "linked_output"
+        linked_output_dir.symlink_to(mock_output_dir)
+        mocker.patch("config.get_mounted_output_dir", return_value=mock_output_dir)
+        mocker.patch("src.inference.docker_client.check_container_status", return_value=True)
+        mocker.patch("src.inference.docker_client.docker.from_env")
+        mocker.patch("src.inference.docker_client._exec_with_api", return_value=(0, ""))
+        mock_copy = mocker.patch("src.inference.docker_client.shutil.copy2")
+        (mock_output_dir / "test_image.json").write_text('{"annotations": []}')
+        
+        result = run_docker_inference(image_path=mock_image_path, output_dir=linked_output_dir)
+        
+        assert result["json_path"] == str(mock_output_dir / "test_image.json")
+        mock_copy.assert_not_called()
+    
+    def test_missing_command_in_container(
+        self, mock_image_path: Path, mock_output_dir: Path, mocker: "MockerFixture"
+    ) -> None:
+        """测试容器中缺少 timeout 等命令（退出码 127）时给出明确的错误."""
+        mocker.patch("src.inference.docker_client.check_container_status", return_value=True)
+        mocker.patch("src.inference.docker_client.docker.from_env")
+        mocker.patch(
+            "src.inference.docker_client._exec_with_api",
+            return_value=(127, 'exec: "timeout": executable file not found in $PATH'),
+        )
+        
+        with pytest.raises(RuntimeError, match="找不到推理命令.*timeout"):
+            run_docker_inference(image_path=mock_image_path, output_dir=mock_output_dir)
+    
+    @patch("src.inference.docker_client._query_container_status", return_value=True)
+    @patch("src.inference.docker_client.docker.from_env")
+    def test_failure_clears_status_cache(
+        self,
+        mock_docker: Mock,
+        mock_query: Mock,
+        mock_image_path: Path,
+        mock_output_dir: Path,
+    ) -> None:
+        """测试推理失败后重新检查容器状态."""
+        mock_container = Mock()
+        mock_container.client.api.exec_create.return_value = {"Id": "exec-id"}
+        mock_container.client.api.exec_start.side_effect = lambda *args, **kwargs: make_exec_stream([])
+        mock_container.client.api.exec_inspect.return_value = {"ExitCode": 1}
+        mock_docker.return_value.containers.get.return_value = mock_container
+        
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                run_docker_inference(image_path=mock_image_path, output_dir=mock_output_dir)
+        
+        assert mock_query.call_count == 2
+
+
+class TestRunDockerInferenceMany:
+    """测试多张图像并发推理."""
+    
+    def test_results_in_input_order(self, tmp_path: Path, mocker: "MockerFixture") -> None:
+        """测试结果顺序与输入一致，且推理参数被传递."""
+        mock_run = mocker.patch(
+            "src.inference.docker_client.run_docker_inference",
+            side_effect=lambda image_path, **kwargs: {"json_path": f"{image_path.stem}.json"},
+        )
+        image_paths = [tmp_path / f"image_{i}.jpg" for i in range(5)]
+        
+        results = run_docker_inference_many(
+            image_paths, tmp_path / "output", max_workers=3, conf_threshold=0.5
+        )
+        
+        assert [r["json_path"] for r in results] == [f"image_{i}.json" for i in range(5)]
+        assert mock_run.call_count == 5
+        assert all(
+            call.kwargs == {"output_dir": tmp_path / "output", "conf_threshold": 0.5}
+            for call in mock_run.call_args_list
+        )
+    
+    def test_failure_is_raised(self, tmp_path: Path, mocker: "MockerFixture") -> None:
+        """测试任一图像推理失败时抛出异常."""
+        mocker.patch(
+            "src.inference.docker_client.run_docker_inference",
+            side_effect=RuntimeError("推理失败"),
+        )
+        
+        with pytest.raises(RuntimeError, match="推理失败"):
+            run_docker_inference_many(
+                [tmp_path / "a.jpg", tmp_path / "b.jpg"], tmp_path / "output"
+            )
+
+class TestExecWithApi:
+    """测试通过 Docker API 执行推理命令."""
+    
+    def test_exit_code_and_output(self) -> None:
+        """测试返回退出码和输出，并关闭输出流."""
+        mock_container = Mock()
+        stream = make_exec_stream([(b"line 1\n", None), (None, b"line 2\n")])
+        mock_container.client.api.exec_create.return_value = {"Id": "exec-id"}
+        mock_container.client.api.exec_start.return_value = stream
+        mock_container.client.api.exec_inspect.return_value = {"ExitCode": 3}
+        
+        exit_code, output = _exec_with_api(mock_container, ["python", "run.py"], timeout=30.0)
+        
+        assert exit_code == 3
+        assert output == "line 1\nline 2"
+        stream.close.assert_called_once()
+    
+    def test_stalled_stream_times_out(self, monkeypatch: "MonkeyPatch") -> None:
+        """测试命令长时间没有输出时按截止时间超时，并关闭输出流."""
+        monkeypatch.setattr(docker_client, "_EXEC_KILL_GRACE_SECONDS", 0.0)
+        closed = threading.Event()
+        finished = threading.Event()
+        
+        def stalled_output() -> Iterator[tuple[bytes | None, bytes | None]]:
+            """输出一行后不再有输出，直到输出流被关闭（关闭后读取出错）."""
+            try:
+                yield b"loading model\n", None
+                closed.wait()
+                raise OSError("stream closed")
+            finally:
+                finished.set()
+        
+        def close() -> None:
+            """关闭输出流，并等待读取线程随之结束."""
+            closed.set()
+            finished.wait(5.0)
+        
+        mock_container = Mock()
+        stream = MagicMock()
+        stream.__iter__.return_value = stalled_output()
+        stream.close.side_effect = close
+        mock_container.client.api.exec_create.return_value = {"Id": "exec-id"}
+        mock_container.client.api.exec_start.return_value = stream
+        mock_container.client.api.exec_inspect.return_value = {"ExitCode": None}
+        
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            _exec_with_api(mock_container, ["python", "run.py"], timeout=0.2)
+        
+        assert time.monotonic() - start < 5.0
+        stream.close.assert_called_once()
+        mock_container.client.api.exec_inspect.assert_not_called()
+    
+    def test_waits_for_exit_code(self, mocker: "MockerFixture") -> None:
+        """测试输出流结束时退出码尚未记录，重新查询直到取得退出码."""
+        mock_sleep = mocker.patch("src.inference.docker_client.time.sleep")
+        mock_container = Mock()
+        mock_container.client.api.exec_create.return_value = {"Id": "exec-id"}
+        mock_container.client.api.exec_start.return_value = make_exec_stream([(b"done\n", None)])
+        mock_container.client.api.exec_inspect.side_effect = [
+            {"ExitCode": None},
+            {"ExitCode": None},
+            {"ExitCode": 0},
+        ]
+        
+        exit_code, output = _exec_with_api(mock_container, ["python", "run.py"], timeout=30.0)
+        
+        assert exit_code == 0
+        assert output == "done"
+        assert mock_sleep.call_count == 2
+    
+    def test_killed_by_deadline_is_timeout(self) -> None:
+        """测试容器内的 timeout 在截止时间终止进程时报告为超时."""
+        mock_container = Mock()
+        mock_container.client.api.exec_create.return_value = {"Id": "exec-id"}
+        mock_container.client.api.exec_start.return_value = make_exec_stream([])
+        mock_container.client.api.exec_inspect.return_value = {"ExitCode": 137}
+        
+        with pytest.raises(TimeoutError):
+            _exec_with_api(mock_container, ["python", "run.py"], timeout=0.0)
+
+
+class TestExecWithCli:
+    """测试通过命令行执行推理命令."""
+    
+    def test_exit_code_and_output(self) -> None:
+        """测试返回退出码和输出."""
+        cmd = [sys.executable, "-c", "import sys; print('line 1'); print('line 2'); sys.exit(3)"]
+        
+        exit_code, output = _exec_with_cli(cmd, timeout=30.0)
+        
+        assert exit_code == 3
+        assert output == "line 1\nline 2"
+    
+    def test_timeout_kills_process(self) -> None:
+        """测试超时后终止进程."""
+        cmd = [sys.executable, "-c", "import time; time.sleep(30)"]
+        
+        start = time.monotonic()
+        with pytest.raises(subprocess.TimeoutExpired):
+            _exec_with_cli(cmd, timeout=0.2)
+        
+        assert time.monotonic() - start < 10.0
+
+
+class TestStageFile:
+    """测试将输入文件放入挂载目录."""
+    
+    def test_hardlink_on_same_filesystem(self, tmp_path: Path) -> None:
+        """测试同一文件系统上创建硬链接."""
+        source = tmp_path / "image.jpg"
+        source.write_bytes(b"image data")
+        target = tmp_path / "mounted" / "image.jpg"
+        target.parent.mkdir()
+        
+        _stage_file(source, target)
+        
+        assert target.read_bytes() == b"image data"
+        assert target.stat().st_ino == source.stat().st_ino
+    
+    def test_copy_when_link_fails(self, tmp_path: Path, mocker: "MockerFixture") -> None:
+        """测试无法创建硬链接时复制文件，并替换已存在的旧文件."""
+        mocker.patch("src.inference.docker_client.os.link", side_effect=OSError("EXDEV"))
+        source = tmp_path / "image.jpg"
+        source.write_bytes(b"new data")
+        target = tmp_path / "staged.jpg"
+        target.write_bytes(b"old data")
+        
+        _stage_file(source, target)
+        
+        assert target.read_bytes() == b"new data"
+        assert target.stat().st_ino != source.stat().st_ino
+
+class TestWaitForFile:
+    """测试等待结果文件."""
+    
+    def test_existing_file_returns_immediately(
+        self, tmp_path: Path, mocker: "MockerFixture"
+    ) -> None:
+        """测试文件已存在时不等待."""
+        mock_sleep = mocker.patch("src.inference.docker_client.time.sleep")
+        path = tmp_path / "result.json"
+        path.write_text("{}")
+        
+        assert _wait_for_file(path, timeout=10.0) is True
+        mock_sleep.assert_not_called()
+    
+    def test_file_created_later(self, tmp_path: Path) -> None:
+        """测试等待期间出现的文件."""
+        path = tmp_path / "result.json"
+        timer = threading.Timer(0.05, path.write_text, args=("{}",))
+        timer.start()
+        try:
+            assert _wait_for_file(path, timeout=5.0) is True
+        finally:
+            timer.cancel()
+    
+    def test_timeout(self, tmp_path: Path) -> None:
+        """测试超时后返回 False."""
+        start = time.monotonic()
+        
+        assert _wait_for_file(tmp_path / "missing.json", timeout=0.1) is False
+        assert time.monotonic() - start < 1.0
 
 class TestGetContainerLogs:
     """测试获取容器日志."""
@@ -0,0 +1,37 @@
+"""测试图像信息模块."""
+
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.utils.image_info import get_image_shape
+
+
+class TestGetImageShape:
+    """测试读取图像尺寸."""
+    
+    def test_shape_matches_imread(self, tmp_path: Path) -> None:
+        """测试尺寸与 cv2.imread 一致."""
+        image_path = tmp_path / "rect.png"
+        cv2.imwrite(str(image_path), np.zeros((40, 60, 3), dtype=np.uint8))
+        
+        assert get_image_shape(image_path) == (40, 60)
+        assert get_image_shape(image_path) == cv2.imread(str(image_path)).shape[:2]
+    
+    def test_exif_rotated_image(self, tmp_path: Path) -> None:
+        """测试 EXIF 旋转 90° 的图像交换宽高."""
+        image_path = tmp_path / "rotated.jpg"
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        Image.new("RGB", (60, 40)).save(image_path, exif=exif)
+        
+        assert get_image_shape(image_path) == cv2.imread(str(image_path)).shape[:2]
+        assert get_image_shape(image_path) == (60, 40)
+    
+    def test_nonexistent_image(self, tmp_path: Path) -> None:
+        """测试读取不存在的图像."""
+        with pytest.raises(FileNotFoundError):
+            get_image_shape(tmp_path / "nonexistent.jpg")
@@ -13,6 +13,7 @@ from src.visualization.image_stitcher import (
     create_visualization,
     draw_detection_on_image,
     draw_detections_on_image,
+    encode_image,
     image_to_pil,
     load_image,
     pil_to_image,
@@ -89,6 +90,31 @@ class TestSaveImage:
         assert loaded.shape == (50, 50, 3)
 
 
+class TestEncodeImage:
+    """测试图像编码."""
+    
+    def test_encode_png_round_trip(self) -> None:
+        """测试 PNG 编码可以无损解码."""
+        image = np.zeros((20, 30, 3), dtype=np.uint8)
+        image[5:10, 5:10] = [0, 0, 255]
+        
+        data = encode_image(image, ".png", [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        decoded = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        
+        assert data.startswith(b"\x89PNG")
+        np.testing.assert_array_equal(decoded, image)
+    
+    def test_encode_jpeg(self) -> None:
+        """测试 JPEG 编码."""
+        image = np.zeros((20, 30, 3), dtype=np.uint8)
+        
+        data = encode_image(image, ".jpg", [cv2.IMWRITE_JPEG_QUALITY, 85])
+        decoded = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        
+        assert data.startswith(b"\xff\xd8")
+        assert decoded.shape == image.shape
+
+
 class TestDrawDetectionOnImage:
     """测试绘制单个检测框."""
     
@@ -186,6 +212,26 @@ class TestCreateVisualization:
         )
         
         assert isinstance(result, np.ndarray)
+    
+    def test_create_visualization_with_decoded_image(
+        self, sample_image: Path, sample_detection: Detection
+    ) -> None:
+        """测试传入已解码原图时的结果与从文件加载一致，且不修改原图."""
+        base_image = load_image(sample_image)
+        original = base_image.copy()
+        
+        result = create_visualization(
+            image_path=sample_image,
+            detections=[sample_detection],
+            image=base_image,
+        )
+        expected = create_visualization(
+            image_path=sample_image,
+            detections=[sample_detection],
+        )
+        
+        np.testing.assert_array_equal(result, expected)
+        np.testing.assert_array_equal(base_image, original)
 
 
 class TestImageConversion:
@@ -1,10 +1,12 @@
 """测试数据模型."""
 
+import pickle
 from typing import TYPE_CHECKING
 
+import numpy as np
 import pytest
 
-from src.inference.models import Detection
+from src.inference.models import Detection, DetectionBatch
 
 if TYPE_CHECKING:
     from _pytest.capture import CaptureFixture
@@ -96,4 +98,55 @@ def test_detection_with_explicit_center() -> None:
     assert detection.y_center == 55.0
 
 
+def test_detection_uses_slots() -> None:
+    """测试 Detection 不带实例 __dict__，且可以序列化（缓存与多进程依赖 pickle）."""
+    detection = Detection(bbox=[10.0, 20.0, 100.0, 50.0], confidence=0.85, category_id=0)
+    
+    assert not hasattr(detection, "__dict__")
+    assert pickle.loads(pickle.dumps(detection)) == detection
+
+
+def test_detection_restores_legacy_pickle_state() -> None:
+    """测试可以恢复旧版本（带 __dict__）序列化的字段字典，避免磁盘缓存失效时报错."""
+    detection = Detection.__new__(Detection)
+    detection.__setstate__({
+        "bbox": [10.0, 20.0, 100.0, 50.0],
+        "confidence": 0.85,
+        "category_id": 0,
+        "category_name": "pile",
+        "x_center": 60.0,
+        "y_center": 45.0,
+    })
+    
+    assert detection == Detection(
+        bbox=[10.0, 20.0, 100.0, 50.0],
+        confidence=0.85,
+        category_id=0,
+        category_name="pile",
+    )
 
+
+def test_detection_batch_round_trip() -> None:
+    """测试 Detection 列表与列式存储之间往返转换不丢失信息."""
+    detections = [
+        Detection(bbox=[10.0, 20.0, 100.0, 50.0], confidence=0.85, category_id=0, category_name="pile"),
+        Detection(bbox=[200.0, 300.0, 40.0, 60.0], confidence=0.4, category_id=1),
+    ]
+    
+    batch = DetectionBatch.from_detections(detections)
+    
+    assert len(batch) == 2
+    np.testing.assert_array_equal(batch.centers, [[60.0, 45.0], [220.0, 330.0]])
+    np.testing.assert_array_equal(batch.sizes, [[100.0, 50.0], [40.0, 60.0]])
+    assert batch.to_detections() == detections
+
+
+def test_detection_batch_from_centers() -> None:
+    """测试用统一尺寸构造新增的检测点."""
+    batch = DetectionBatch.from_centers(np.array([[100.0, 100.0]]), width=20.0, height=10.0)
+    
+    detections = batch.to_detections()
+    
+    assert detections == [
+        Detection(bbox=[90.0, 95.0, 20.0, 10.0], confidence=0.5, category_id=0)
+    ]